@@ -0,0 +1,127 @@
+"""
+Benchmark de inicialização: mede, com `python -X importtime`, o custo de importar
+os módulos de entrada do projeto em um interpretador novo.
+
+    uv run python benchmarks/importtime.py [--repeticoes 5] [--saida arquivo.json]
+
+Cada execução é acrescentada ao JSON de saída (com commit e data), para acompanhar
+a evolução ao longo do tempo.
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAIDA_PADRAO = os.path.join(RAIZ, "benchmarks", "results", "importtime.json")
+MODULOS = (
+    "src.agents.data_agent",
+    "src.agents.news_agent",
+    "src.agents.report_agent",
+    "src.crew_core",
+    "run_crew",
+)
+TOP_N = 10
+
+# Linha do -X importtime: "import time: self [us] | cumulative | imported package"
+_LINHA = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+def _mede(modulo):
+    """Importa `modulo` num processo novo; retorna (wall_s, cumulativo_us, filhos)."""
+    inicio = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        cwd=RAIZ,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    wall = time.perf_counter() - inicio
+
+    total, filhos = 0, {}
+    for linha in proc.stderr.splitlines():
+        m = _LINHA.match(linha)
+        if not m:
+            continue
+        cumulativo, nivel, nome = int(m.group(2)), len(m.group(3)), m.group(4)
+        if nivel == 0:
+            # Imports de primeiro nível (inclusive os feitos pelo interpretador)
+            filhos[nome] = filhos.get(nome, 0) + cumulativo
+            total += cumulativo
+    return wall, total, filhos
+
+
+def executa(modulos=MODULOS, repeticoes=5):
+    """Mede cada módulo `repeticoes` vezes e resume pelas medianas."""
+    resultados = {}
+    for modulo in modulos:
+        amostras = [_mede(modulo) for _ in range(repeticoes)]
+        ultimo = amostras[-1][2]
+        resultados[modulo] = {
+            "wall_s": round(statistics.median(a[0] for a in amostras), 4),
+            "import_ms": round(statistics.median(a[1] for a in amostras) / 1000, 2),
+            "mais_pesados_ms": {
+                nome: round(us / 1000, 2)
+                for nome, us in sorted(ultimo.items(), key=lambda kv: -kv[1])[:TOP_N]
+            },
+        }
+    return resultados
+
+
+def commit_atual():
+    """Hash curto do commit atual (None fora de um repositório git)."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=RAIZ,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def grava(resultados, saida=SAIDA_PADRAO):
+    """Acrescenta a execução ao histórico em JSON."""
+    historico = []
+    if os.path.exists(saida):
+        with open(saida, encoding="utf-8") as f:
+            historico = json.load(f)
+    historico.append(
+        {
+            "data": datetime.now().isoformat(timespec="seconds"),
+            "commit": commit_atual(),
+            "python": platform.python_version(),
+            "resultados": resultados,
+        }
+    )
+    os.makedirs(os.path.dirname(saida), exist_ok=True)
+    with open(saida, "w", encoding="utf-8") as f:
+        json.dump(historico, f, indent=2, ensure_ascii=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mede o tempo de importação dos módulos.")
+    parser.add_argument("modulos", nargs="*", default=list(MODULOS))
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--saida", default=SAIDA_PADRAO)
+    args = parser.parse_args(argv)
+
+    resultados = executa(args.modulos, args.repeticoes)
+    for modulo, r in resultados.items():
+        print(f"{modulo:<28} {r['import_ms']:>9.1f} ms import | {r['wall_s']:.3f} s processo")
+    grava(resultados, args.saida)
+    print(f"Resultados acrescentados em {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+"""
+Suíte de benchmarks ponta a ponta, sem rede: gera um CSV sintético no formato do
+DATASUS, carrega-o num DB novo e mede a carga, cada consulta do Data Agent, o
+`data_agent_func` completo e o `report_agent_func` com um cliente Groq falso.
+
+    uv run python -m benchmarks.suite [--linhas 200k] [--repeticoes 5]
+    uv run python -m benchmarks.suite --csv data/srag_csvs/SRAG_SINTETICO.csv
+    uv run python -m benchmarks.suite --comparar   # compara com a execução anterior
+
+Cada execução é acrescentada ao JSON de saída (com commit, data e parâmetros).
+Com --comparar, medianas acima de (1 + limiar) vezes a referência são apontadas
+como regressão e o processo termina com código 1.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+# As consultas são medidas sem o cache de resultados (importado pelo sql_tool)
+os.environ.setdefault("SRAG_QUERY_CACHE", "0")
+
+from benchmarks.importtime import RAIZ, commit_atual  # noqa: E402
+from src.utils.synthetic_data import gera_csv, quantidade_linhas  # noqa: E402
+
+SAIDA_PADRAO = os.path.join(RAIZ, "benchmarks", "results", "suite.json")
+LIMIAR_PADRAO = 0.2  # regressão: mediana 20% acima da referência
+LATENCIA_LLM = 0.2  # segundos por resposta do cliente Groq falso
+
+# Consultas do Data Agent medidas individualmente (funções que recebem db_path)
+CONSULTAS = (
+    "_daily_series_last_30",
+    "_monthly_cases_series_last_12",
+    "_monthly_cases_series",
+    "_monthly_deaths_series",
+    "_monthly_vaccination_covid_series",
+    "_monthly_vaccination_gripe_series",
+    "_monthly_case_pacient_sex",
+    "_monthly_uti_occupation_series",
+    "_monthly_categorical_distribution_series",
+    "_monthly_case_results_distribution_series",
+    "_monthly_cases_by_uf_series",
+    "_fused_daily_aggregate",
+)
+
+
+class ClienteGroqFalso:
+    """Imita client.chat.completions.create: responde após `latencia` segundos."""
+
+    def __init__(self, latencia=LATENCIA_LLM, trechos=20):
+        self.latencia = latencia
+        self.trechos = trechos
+        self.chamadas = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, stream=False, **params):
+        self.chamadas += 1
+        texto = f"Resposta sintética ({params.get('model')})."
+        if stream:
+            return self._stream(texto)
+        time.sleep(self.latencia)
+        mensagem = SimpleNamespace(content=texto, executed_tools=None)
+        return SimpleNamespace(choices=[SimpleNamespace(message=mensagem)])
+
+    def _stream(self, texto):
+        for _ in range(self.trechos):
+            time.sleep(self.latencia / self.trechos)
+            delta = SimpleNamespace(content=texto + " ")
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+def _resume(amostras):
+    return {
+        "mediana_s": round(statistics.median(amostras), 4),
+        "min_s": round(min(amostras), 4),
+        "amostras_s": [round(a, 4) for a in amostras],
+    }
+
+
+def mede(func, *args, repeticoes=5, antes=None):
+    """Executa func(*args) `repeticoes` vezes (chamando `antes` fora da medição)."""
+    amostras = []
+    for _ in range(repeticoes):
+        if antes:
+            antes()
+        inicio = time.perf_counter()
+        func(*args)
+        amostras.append(time.perf_counter() - inicio)
+    return _resume(amostras)
+
+
+def bench_carga(csv, diretorio, bulk=False):
+    """Carrega o CSV num DB novo; retorna (caminho do DB, resultado com linhas/s)."""
+    from src.utils.db_utils import abre_banco, carga_bulk, processar_csv
+
+    db_path = os.path.join(diretorio, "srag.db")
+    for sufixo in ("", "-wal", "-shm"):
+        if os.path.exists(db_path + sufixo):
+            os.remove(db_path + sufixo)
+
+    con = abre_banco(db_path)
+    try:
+        inicio = time.perf_counter()
+        if bulk:
+            carga_bulk(con, [csv], forcar=True)
+        else:
+            processar_csv(con, csv, forcar=True)
+        segundos = time.perf_counter() - inicio
+        linhas = con.execute("SELECT SUM(CASOS) FROM srag_diario").fetchone()[0] or 0
+    finally:
+        con.close()
+
+    resultado = _resume([segundos])
+    resultado["linhas"] = linhas
+    resultado["linhas_por_s"] = round(linhas / segundos) if segundos > 0 else None
+    return db_path, resultado
+
+
+def bench_consultas(db_path, repeticoes):
+    from src.agents import data_agent
+    from src.tools.sql_tool import cache_consultas
+    from src.utils.backfill import INICIO_PADRAO, datas_referencia
+
+    resultados = {}
+    for nome in CONSULTAS:
+        func = getattr(data_agent, nome, None)
+        if func is None:
+            continue
+        resultados[f"data_agent.{nome}"] = mede(
+            func, db_path, repeticoes=repeticoes, antes=cache_consultas.limpa
+        )
+    # backfill semanal sobre todo o histórico carregado (uma varredura para todas as datas)
+    datas = datas_referencia(INICIO_PADRAO, data_agent._resolve_as_of(db_path))
+    resultados["data_agent.backfill_metricas"] = mede(
+        data_agent.backfill_metricas,
+        db_path,
+        datas,
+        repeticoes=repeticoes,
+        antes=cache_consultas.limpa,
+    )
+    resultados["data_agent_func"] = mede(
+        data_agent.data_agent_func,
+        {"db_path": db_path},
+        repeticoes=repeticoes,
+        antes=cache_consultas.limpa,
+    )
+    resultados["data_agent_uf_func"] = mede(
+        data_agent.data_agent_uf_func,
+        {"db_path": db_path},
+        repeticoes=repeticoes,
+        antes=cache_consultas.limpa,
+    )
+    return resultados
+
+
+def bench_relatorio(db_path, diretorio, repeticoes, latencia):
+    """Mede report_agent_func com o cliente Groq falso (com e sem streaming)."""
+    from src.agents import report_agent
+    from src.agents.data_agent import data_agent_func
+    from src.tools import llm_cache, llm_client
+
+    cliente = ClienteGroqFalso(latencia)
+    original = (llm_client._client, llm_cache.CACHE_ATIVO, report_agent.OUTPUT_DIR)
+    llm_client._client = cliente
+    llm_cache.CACHE_ATIVO = False  # toda chamada chega ao cliente falso
+    report_agent.OUTPUT_DIR = os.path.join(diretorio, "reports")
+
+    contexto = data_agent_func({"db_path": db_path})
+    silencioso = lambda evento: None  # noqa: E731
+
+    try:
+        resultados = {}
+        for nome, extra in (
+            ("report_agent_func", {}),
+            ("report_agent_func.news_no_contexto", {"news_summary": "N", "sources": []}),
+            ("report_agent_func.streaming", {"streaming": True, "on_progress": silencioso}),
+        ):
+            resultados[nome] = mede(
+                report_agent.report_agent_func, {**contexto, **extra}, repeticoes=repeticoes
+            )
+        resultados["report_agent_func"]["chamadas_llm"] = cliente.chamadas
+    finally:
+        llm_client._client, llm_cache.CACHE_ATIVO, report_agent.OUTPUT_DIR = original
+    return resultados
+
+
+def executa(csv=None, linhas=200_000, repeticoes=5, bulk=False, latencia=LATENCIA_LLM):
+    diretorio = tempfile.mkdtemp(prefix="srag_bench_")
+    try:
+        resultados = {}
+        if csv is None:
+            csv = os.path.join(diretorio, "SRAG_SINTETICO.csv")
+            inicio = time.perf_counter()
+            gera_csv(csv, linhas)
+            resultados["gera_csv"] = _resume([time.perf_counter() - inicio])
+
+        db_path, resultados["processar_csv"] = bench_carga(csv, diretorio)
+        if bulk:
+            db_path, resultados["carga_bulk"] = bench_carga(csv, diretorio, bulk=True)
+        resultados.update(bench_consultas(db_path, repeticoes))
+        resultados.update(bench_relatorio(db_path, diretorio, repeticoes, latencia))
+        return resultados
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+
+def _le_historico(caminho):
+    if not os.path.exists(caminho):
+        return []
+    with open(caminho, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def grava(resultados, parametros, saida=SAIDA_PADRAO):
+    """Acrescenta a execução ao histórico em JSON."""
+    historico = _le_historico(saida)
+    historico.append(
+        {
+            "data": datetime.now().isoformat(timespec="seconds"),
+            "commit": commit_atual(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "parametros": parametros,
+            "resultados": resultados,
+        }
+    )
+    os.makedirs(os.path.dirname(saida), exist_ok=True)
+    with open(saida, "w", encoding="utf-8") as f:
+        json.dump(historico, f, indent=2, ensure_ascii=False)
+
+
+def compara(resultados, referencia, limiar=LIMIAR_PADRAO):
+    """Lista (nome, referência, atual) das medianas que pioraram além do limiar."""
+    regressoes = []
+    for nome, atual in resultados.items():
+        base = referencia.get(nome)
+        if not base or not base.get("mediana_s"):
+            continue
+        if atual["mediana_s"] > base["mediana_s"] * (1 + limiar):
+            regressoes.append((nome, base["mediana_s"], atual["mediana_s"]))
+    return regressoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks ponta a ponta do projeto SRAG.")
+    parser.add_argument("--csv", help="CSV existente (padrão: gera um sintético)")
+    parser.add_argument("--linhas", default="200k", help="linhas do CSV sintético (ex.: 1M)")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--bulk", action="store_true", help="também mede a carga em massa")
+    parser.add_argument("--latencia-llm", type=float, default=LATENCIA_LLM)
+    parser.add_argument("--saida", default=SAIDA_PADRAO)
+    parser.add_argument(
+        "--comparar",
+        nargs="?",
+        const="",
+        help="JSON de referência (padrão: execução anterior no arquivo de saída)",
+    )
+    parser.add_argument("--limiar", type=float, default=LIMIAR_PADRAO)
+    args = parser.parse_args(argv)
+
+    # Referência lida antes de gravar a execução atual no mesmo arquivo
+    referencia = None
+    if args.comparar is not None:
+        historico = _le_historico(args.comparar or args.saida)
+        referencia = historico[-1]["resultados"] if historico else {}
+
+    parametros = {
+        "csv": args.csv,
+        "linhas": None if args.csv else quantidade_linhas(args.linhas),
+        "repeticoes": args.repeticoes,
+        "latencia_llm": args.latencia_llm,
+    }
+    resultados = executa(
+        args.csv, parametros["linhas"], args.repeticoes, args.bulk, args.latencia_llm
+    )
+
+    print()
+    for nome, r in resultados.items():
+        extra = f" | {r['linhas_por_s']:,} linhas/s" if r.get("linhas_por_s") else ""
+        print(f"{nome:<58} {r['mediana_s']:>9.4f} s{extra}")
+    grava(resultados, parametros, args.saida)
+    print(f"Resultados acrescentados em {args.saida}")
+
+    if referencia is not None:
+        regressoes = compara(resultados, referencia, args.limiar)
+        for nome, base, atual in regressoes:
+            print(f"⚠️ Regressão em {nome}: {base:.4f}s -> {atual:.4f}s")
+        if regressoes:
+            sys.exit(1)
+        print("Nenhuma regressão acima do limiar.")
+
+
+if __name__ == "__main__":
+    main()
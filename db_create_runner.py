@@ -1,11 +1,95 @@
-import sys
+import argparse
+import os
+from concurrent.futures import ThreadPoolExecutor
 
 from src.utils import db_utils, get_data
 
+DEFAULT_URL = "https://opendatasus.saude.gov.br/dataset/srag-2021-a-2024"
+MODOS = ("sequencial", "pipeline", "streaming")
 
-def main(url=None):
-    DATASET_URL = url or "https://opendatasus.saude.gov.br/dataset/srag-2021-a-2024"
-    print("Iniciando pipeline SRAG - DATASUS")
+
+def _pipeline(url, workers):
+    """
+    Baixa os CSVs em paralelo e carrega cada um assim que seu download termina.
+    A carga roda na thread principal, que é a única escritora no SQLite, e segue a
+    ordem dos arquivos (por nome, como no modo sequencial): com NU_NOTIFIC repetido
+    entre arquivos, a linha mantida não depende de qual download termina primeiro.
+    """
+    session = get_data.cria_sessao(workers)
+    csv_links = get_data.get_csv_links(get_data.fetch_html(url, session=session))
+    if not csv_links:
+        print("⚠️ Nenhum link CSV encontrado.")
+        return
+    csv_links = sorted(csv_links)
+
+    progresso = get_data.Progresso(len(csv_links))
+    con = db_utils.abre_banco()
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futuros = [
+                pool.submit(
+                    get_data.download_csv, name, csv_url, session=session, progresso=progresso
+                )
+                for name, csv_url in csv_links
+            ]
+            for (name, _), futuro in zip(csv_links, futuros, strict=True):
+                try:
+                    futuro.result()
+                except Exception as e:
+                    # Como no modo sequencial: a falha de um download não interrompe os demais
+                    print(f"❌ Erro no download de {name}: {e}")
+                progresso.conclui_arquivo(name)
+                # Carrega o arquivo local (novo ou já atualizado), como no modo sequencial
+                caminho = os.path.join(get_data.OUTPUT_DIR, name)
+                if os.path.exists(caminho):
+                    db_utils.processar_csv(con, caminho)
+                else:
+                    print(f"⚠️ {name} não disponível localmente; carga ignorada.")
+    finally:
+        con.close()
+    print(f"Downloads: {progresso.resumo()}")
+
+
+def _streaming(url):
+    """
+    Alimenta o leitor CSV em lotes diretamente com o corpo da resposta HTTP,
+    sem gravar os arquivos em disco.
+    """
+    session = get_data.cria_sessao(1)
+    csv_links = get_data.get_csv_links(get_data.fetch_html(url, session=session))
+    if not csv_links:
+        print("⚠️ Nenhum link CSV encontrado.")
+        return
+
+    con = db_utils.abre_banco()
+    try:
+        for name, csv_url in csv_links:
+            try:
+                with session.get(csv_url, stream=True, timeout=get_data.TIMEOUT) as r:
+                    r.raise_for_status()
+                    r.raw.decode_content = True  # descompacta gzip/deflate se houver
+                    db_utils.processar_csv(con, r.raw, nome=name)
+            except Exception as e:
+                print(f"❌ Erro no streaming de {name}: {e}")
+    finally:
+        con.close()
+
+
+def main(url=None, modo="sequencial", workers=get_data.DOWNLOAD_WORKERS):
+    DATASET_URL = url or DEFAULT_URL
+    print(f"Iniciando pipeline SRAG - DATASUS (modo {modo})")
+
+    if modo == "pipeline":
+        # Download e carga sobrepostos: cada arquivo é carregado ao terminar de baixar
+        _pipeline(DATASET_URL, workers)
+        print("Pipeline finalizado com sucesso!")
+        return
+
+    if modo == "streaming":
+        # Carga direto da rede, sem arquivos intermediários
+        _streaming(DATASET_URL)
+        print("Pipeline finalizado com sucesso!")
+        return
 
     # Etapa 1: Baixar os dados
     print("[1/2] Baixando dados do OpenDataSUS...")
@@ -21,5 +105,9 @@ def main(url=None):
 
 
 if __name__ == "__main__":
-    url_arg = sys.argv[1] if len(sys.argv) > 1 else None
-    main(url=url_arg)
+    parser = argparse.ArgumentParser(description="Cria/atualiza o banco SRAG a partir do DATASUS.")
+    parser.add_argument("url", nargs="?", default=None)
+    parser.add_argument("--modo", choices=MODOS, default="sequencial")
+    parser.add_argument("--workers", type=int, default=get_data.DOWNLOAD_WORKERS)
+    args = parser.parse_args()
+    main(url=args.url, modo=args.modo, workers=args.workers)
@@ -1,49 +1,139 @@
 import os
 
 from dotenv import load_dotenv
-from langfuse import get_client
-from openinference.instrumentation.crewai import CrewAIInstrumentor
-from openinference.instrumentation.litellm import LiteLLMInstrumentor
 
-from src.agents.data_agent import data_agent_func
+from src.agents.data_agent import data_agent_func, data_agent_uf_func
 from src.agents.news_agent import news_agent_func
-from src.agents.report_agent import report_agent_func
+from src.agents.report_agent import NEWS_QUERY, report_agent_func, report_agent_uf_func
 from src.crew_core import Agent, Crew
+from src.tools import instrumentation
+from src.tools.tracing import get_langfuse, verifica_auth_em_background
 
 # Carrega variáveis de ambiente
 load_dotenv()
 
-# Inicializa cliente Langfuse
-langfuse = get_client()
+# Modo por UF: um relatório por estado (SRAG_POR_UF=1); SRAG_UFS="SP,RJ" restringe
+POR_UF = os.getenv("SRAG_POR_UF", "0") == "1"
 
-if langfuse.auth_check():
-    print("Langfuse client is authenticated and ready!")
-else:
-    print("Authentication failed. Please check your credentials and host.")
-
-# Inicializa instrumentação automática para tracing
-CrewAIInstrumentor().instrument(skip_dep_check=True)
-LiteLLMInstrumentor().instrument()
-
-# Define agentes
+# Define agentes com as chaves de contexto que leem e produzem: DataAgent e
+# NewsAgent são independentes e rodam em paralelo; ReportAgent espera ambos
 agents = [
-    Agent(name="DataAgent", role_description="Consulta DB e extrai métricas", func=data_agent_func),
+    Agent(
+        name="DataAgent",
+        role_description="Consulta DB e extrai métricas",
+        func=data_agent_func,
+        inputs=["db_path", "as_of", "incluir_sem_data"],
+        outputs=[
+            "as_of",
+            "daily_cases",
+            "monthly_cases",
+            "monthly_cases_all",
+            "monthly_cases_by_sex",
+            "metrics",
+        ],
+    ),
     Agent(
         name="NewsAgent",
         role_description="Busca notícias recentes sobre SRAG",
         func=news_agent_func,
+        inputs=["news_query"],
+        outputs=["news_summary", "sources"],
+    ),
+    Agent(
+        name="ReportAgent",
+        role_description="Gera relatório e gráficos",
+        func=report_agent_func,
+        inputs=[
+            "as_of",
+            "metrics",
+            "daily_cases",
+            "monthly_cases",
+            "monthly_cases_all",
+            "monthly_cases_by_sex",
+            "news_summary",
+            "sources",
+        ],
+        outputs=["report_path", "daily_img", "monthly_img"],
+    ),
+]
+
+
+# Modo por UF: a mesma Crew com Data e Report Agents por estado; o NewsAgent (nacional)
+# roda uma vez e suas notícias entram em todos os relatórios
+agents_por_uf = [
+    Agent(
+        name="DataAgent",
+        role_description="Consulta DB e extrai métricas nacionais e por UF",
+        func=data_agent_uf_func,
+        inputs=["db_path", "as_of", "incluir_sem_data", "ufs"],
+        outputs=[
+            "as_of",
+            "daily_cases",
+            "monthly_cases",
+            "monthly_cases_all",
+            "monthly_cases_by_sex",
+            "metrics",
+            "por_uf",
+        ],
+    ),
+    agents[1],
+    Agent(
+        name="ReportAgent",
+        role_description="Gera um relatório com gráficos por UF",
+        func=report_agent_uf_func,
+        inputs=["as_of", "metrics", "por_uf", "news_summary", "sources", "uf_concorrencia"],
+        outputs=["reports_by_uf"],
     ),
-    Agent(name="ReportAgent", role_description="Gera relatório e gráficos", func=report_agent_func),
 ]
 
-# Define o Crew com os agentes
-crew = Crew(agents=agents)
 
-# Executa pipeline com tracing ativo
-with langfuse.start_as_current_observation(name="SRAG-Pipeline", as_type="span"):
-    ctx0 = {"db_path": os.path.join(os.getcwd(), "srag.db")}
-    ctx = crew.execute(initial_context=ctx0)
-    print("Relatório salvo em:", ctx.get("report_path"))
+def main():
+    # Inicializa cliente Langfuse; a verificação de credenciais (chamada de rede)
+    # roda em segundo plano enquanto o pipeline já executa
+    langfuse = get_langfuse()
+    verifica_auth_em_background(langfuse)
+
+    # Inicializa instrumentação automática para tracing
+    from openinference.instrumentation.crewai import CrewAIInstrumentor
+    from openinference.instrumentation.litellm import LiteLLMInstrumentor
+
+    CrewAIInstrumentor().instrument(skip_dep_check=True)
+    LiteLLMInstrumentor().instrument()
+
+    # Define o Crew com os agentes
+    crew = Crew(agents=agents_por_uf if POR_UF else agents)
+
+    # Executa pipeline com tracing ativo
+    with langfuse.start_as_current_observation(name="SRAG-Pipeline", as_type="span"):
+        ctx0 = {"db_path": os.path.join(os.getcwd(), "srag.db"), "news_query": NEWS_QUERY}
+        # Data de referência do relatório (padrão: última notificação carregada)
+        if os.getenv("SRAG_AS_OF"):
+            ctx0["as_of"] = os.getenv("SRAG_AS_OF")
+        # Registros sem data nos totais (padrão: só sem SRAG_AS_OF)
+        if os.getenv("SRAG_INCLUIR_SEM_DATA"):
+            ctx0["incluir_sem_data"] = os.getenv("SRAG_INCLUIR_SEM_DATA") == "1"
+        if POR_UF and os.getenv("SRAG_UFS"):
+            ctx0["ufs"] = [uf.strip().upper() for uf in os.getenv("SRAG_UFS").split(",")]
+        ctx = crew.execute(initial_context=ctx0)
+        if POR_UF:
+            for uf, caminho in ctx.get("reports_by_uf", {}).items():
+                print(f"Relatório {uf} salvo em:", caminho)
+        else:
+            print("Relatório salvo em:", ctx.get("report_path"))
+        print("Tempo por agente:", {k: round(v, 2) for k, v in crew.timings.items()})
+
+    # Resumo por etapa (agentes, SQL, LLM, gráficos) em JSON e textfile do Prometheus
+    print("Tempo por etapa:")
+    instrumentation.imprime_resumo()
+    caminhos = instrumentation.exporta("pipeline")
+    if caminhos:
+        print(f"Métricas da execução: {caminhos['json']} | {caminhos['prometheus']}")
+
+    # Envio dos traces para o lanfuse
+    langfuse.flush()
+
 
-# Envio dos traces para o lanfuse
-langfuse.flush()
+# Guarda necessária: os gráficos são renderizados em processos 'spawn', que
+# reimportam este módulo
+if __name__ == "__main__":
+    main()
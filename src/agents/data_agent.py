@@ -1,286 +1,534 @@
 import os
-from typing import Any, Dict
+from typing import Any, Dict, List
 
+import numpy as np
 import pandas as pd
 
 from src.tools.sql_tool import query_sqlite
+from src.utils.db_utils import MAP_CLAS_FIN, MAP_EVOLUCAO
 
 # Caminho padrão do DB
 DB_PATH = os.path.join(os.getcwd(), "srag.db")
 
-
-def _daily_series_last_30(db_path):
-    """Retorna série diária dos últimos 30 dias."""
-    sql = """
-    SELECT DATA_NOTIFICACAO as date, COUNT(*) as cases
-    FROM srag_casos
-    WHERE DATA_NOTIFICACAO IS NOT NULL
+# Janelas relativas à data de referência (as_of), em dias/meses de calendário
+JANELA_DIARIA = 30
+JANELA_MENSAL = 12
+JANELA_CRESCIMENTO = 7  # taxa de aumento: últimos 7 dias vs. os 7 anteriores
+
+# Consultas SQL do Data Agent, por nome. Os placeholders `?` recebem datas da janela
+# ('AAAA-MM-DD') ou meses ('AAAA-MM') derivados de as_of: BETWEEN e "<=" viram buscas
+# por intervalo na chave primária das rollups, que começa pela chave temporal, e só
+# as linhas da janela são lidas. Registros sem data ('') passam pelo filtro "<=" só
+# quando o último parâmetro (incluir_sem_data, ver _inclui_sem_data) é verdadeiro.
+# Os planos são conferidos por `python -m src.utils.index_advisor`.
+CONSULTAS = {
+    "ultima_data": """
+    SELECT MAX(DATA_NOTIFICACAO) as ultima
+    FROM srag_diario
+    """,
+    "daily_window": """
+    SELECT DATA_NOTIFICACAO as date, SUM(CASOS) as cases
+    FROM srag_diario
+    WHERE DATA_NOTIFICACAO BETWEEN ? AND ?
     GROUP BY DATA_NOTIFICACAO
-    ORDER BY DATA_NOTIFICACAO DESC
-    LIMIT 30
+    ORDER BY DATA_NOTIFICACAO
+    """,
+    "monthly_window": """
+    SELECT MES as month, SUM(CASOS) as cases
+    FROM srag_mensal
+    WHERE MES BETWEEN ? AND ?
+    GROUP BY MES
+    ORDER BY month DESC
+    """,
+    "monthly_cases": """
+    SELECT MES as month, SUM(CASOS) as cases
+    FROM srag_mensal
+    WHERE MES > '' AND MES <= ?
+    GROUP BY MES
+    ORDER BY month DESC
+    """,
+    "monthly_deaths": """
+    SELECT MES as month,
+           SUM(CASE WHEN DESFECHO = 'Óbito' THEN CASOS ELSE 0 END) as deaths
+    FROM srag_mensal
+    WHERE MES > '' AND MES <= ?
+    GROUP BY MES
+    ORDER BY month DESC
+    """,
+    "monthly_vaccination_covid": """
+    SELECT MES as month,
+           SUM(CASE WHEN VACINADO_COVID = 'Sim' THEN CASOS ELSE 0 END) as vaccinated
+    FROM srag_mensal
+    WHERE MES > '' AND MES <= ?
+    GROUP BY MES
+    ORDER BY month DESC
+    """,
+    "monthly_vaccination_gripe": """
+    SELECT MES as month,
+           SUM(CASE WHEN VACINADO_GRIPE = 'Sim' THEN CASOS ELSE 0 END) as vaccinated
+    FROM srag_mensal
+    WHERE MES > '' AND MES <= ?
+    GROUP BY MES
+    ORDER BY month DESC
+    """,
+    "monthly_cases_by_sex": """
+    SELECT MES as month,
+       SUM(CASE WHEN SEXO_PACIENTE = 'Masculino' THEN CASOS ELSE 0 END) as count_homens,
+       SUM(CASE WHEN SEXO_PACIENTE = 'Feminino' THEN CASOS ELSE 0 END) as count_mulheres
+    FROM srag_mensal
+    WHERE MES > '' AND MES <= ?
+    GROUP BY MES
+    ORDER BY month DESC
+    """,
+    "monthly_uti_occupation": """
+    SELECT MES as month,
+           SUM(CASE WHEN INTERNADO_UTI = 'Sim' THEN CASOS ELSE 0 END) as uti_occupied
+    FROM srag_mensal
+    WHERE MES > '' AND MES <= ?
+    GROUP BY MES
+    ORDER BY month DESC
+    """,
+    "monthly_classificacao": """
+    SELECT
+        NULLIF(CLASSIFICACAO_FINAL, '') AS CLASSIFICACAO_FINAL,
+        NULLIF(MES, '') AS month,
+        SUM(CASOS) AS total_casos
+    FROM srag_mensal
+    WHERE MES <= ? AND (MES > '' OR ?)
+    GROUP BY CLASSIFICACAO_FINAL, MES
+    ORDER BY month, total_casos DESC;
+    """,
+    "monthly_desfecho": """
+    SELECT
+        NULLIF(DESFECHO, '') AS DESFECHO,
+        NULLIF(MES, '') AS month,
+        SUM(CASOS) AS total_casos
+    FROM srag_mensal
+    WHERE MES <= ? AND (MES > '' OR ?)
+    GROUP BY DESFECHO, MES
+    ORDER BY month, total_casos DESC;
+    """,
+    "monthly_cases_by_uf": """
+    SELECT
+        NULLIF(UF, '') AS UF,
+        NULLIF(MES, '') AS month,
+        SUM(CASOS) AS total_casos
+    FROM srag_mensal
+    WHERE MES <= ? AND (MES > '' OR ?)
+    GROUP BY UF, MES
+    ORDER BY month, total_casos DESC;
+    """,
+}
+
+
+def _dia(data: pd.Timestamp) -> str:
+    return data.strftime("%Y-%m-%d")
+
+
+def _mes(data: pd.Timestamp) -> str:
+    return data.strftime("%Y-%m")
+
+
+def _resolve_as_of(db_path, as_of=None) -> pd.Timestamp:
+    """Data de referência: `as_of` informado ou a última DATA_NOTIFICACAO carregada."""
+    if as_of is not None:
+        return pd.Timestamp(as_of).normalize()
+    ultima = query_sqlite(db_path, CONSULTAS["ultima_data"]).at[0, "ultima"]
+    return pd.Timestamp(ultima) if ultima else pd.Timestamp.today().normalize()
+
+
+def _inclui_sem_data(as_of=None, incluir_sem_data=None) -> bool:
+    """
+    Se os registros sem DATA_NOTIFICACAO entram nos totais e distribuições. Padrão:
+    só no relatório corrente (sem as_of); para uma data passada eles ficam de fora,
+    pois podem ter sido carregados depois dela. `incluir_sem_data` força a escolha.
     """
-    df = query_sqlite(db_path, sql)
+    return as_of is None if incluir_sem_data is None else bool(incluir_sem_data)
+
+
+def _janela_diaria(as_of: pd.Timestamp, dias: int) -> tuple:
+    """Limites ('AAAA-MM-DD', 'AAAA-MM-DD') dos `dias` dias terminados em as_of."""
+    return _dia(as_of - pd.Timedelta(days=dias - 1)), _dia(as_of)
+
+
+def _janela_mensal(as_of: pd.Timestamp, meses: int) -> tuple:
+    """Limites ('AAAA-MM', 'AAAA-MM') dos `meses` meses terminados no mês de as_of."""
+    return _mes(as_of - pd.DateOffset(months=meses - 1)), _mes(as_of)
+
+
+def _taxa_aumento(diario: pd.DataFrame, as_of: pd.Timestamp):
+    """(soma dos últimos 7 dias) / (soma dos 7 anteriores) - 1, em %, até as_of."""
+    corte = as_of - pd.Timedelta(days=JANELA_CRESCIMENTO)
+    inicio = corte - pd.Timedelta(days=JANELA_CRESCIMENTO)
+    datas = diario["date"]
+    last7 = diario.loc[(datas > corte) & (datas <= as_of), "cases"].sum()
+    prev7 = diario.loc[(datas > inicio) & (datas <= corte), "cases"].sum()
+    return ((last7 - prev7) / prev7 * 100) if prev7 > 0 else None
+
+
+def _daily_series_last_30(db_path, as_of=None):
+    """Retorna série diária dos últimos 30 dias (até as_of)."""
+    as_of = _resolve_as_of(db_path, as_of)
+    df = query_sqlite(
+        db_path, CONSULTAS["daily_window"], params=_janela_diaria(as_of, JANELA_DIARIA)
+    )
     df["date"] = pd.to_datetime(df["date"])
     df = df.sort_values("date")
     return df
 
 
-def _monthly_cases_series_last_12(db_path):
-    """Retorna série de casos mensais dos últimos 12 meses."""
-    sql = """
-    SELECT strftime('%Y-%m', DATA_NOTIFICACAO) as month, COUNT(*) as cases
-    FROM srag_casos
-    WHERE DATA_NOTIFICACAO IS NOT NULL
-    GROUP BY month
-    ORDER BY month DESC
-    LIMIT 12
-    """
-    df = query_sqlite(db_path, sql)
+def _monthly_cases_series_last_12(db_path, as_of=None):
+    """Retorna série de casos mensais dos últimos 12 meses (até as_of)."""
+    as_of = _resolve_as_of(db_path, as_of)
+    df = query_sqlite(
+        db_path, CONSULTAS["monthly_window"], params=_janela_mensal(as_of, JANELA_MENSAL)
+    )
     df["month"] = pd.to_datetime(df["month"] + "-01")
     df = df.sort_values("month")
     return df
 
 
-def _monthly_cases_series(db_path):
+def _monthly_cases_series(db_path, as_of=None):
     """Retorna série de casos mensais"""
-    sql = """
-    SELECT strftime('%Y-%m', DATA_NOTIFICACAO) as month, COUNT(*) as cases
-    FROM srag_casos
-    WHERE DATA_NOTIFICACAO IS NOT NULL
-    GROUP BY month
-    ORDER BY month DESC
-    """
-    df = query_sqlite(db_path, sql)
+    as_of = _resolve_as_of(db_path, as_of)
+    df = query_sqlite(db_path, CONSULTAS["monthly_cases"], params=(_mes(as_of),))
     df["month"] = pd.to_datetime(df["month"] + "-01")
     df = df.sort_values("month")
     return df
 
 
-def _monthly_deaths_series(db_path):
+def _monthly_deaths_series(db_path, as_of=None):
     """Retorna série de óbitos mensais"""
-    sql = """
-    SELECT strftime('%Y-%m', DATA_NOTIFICACAO) as month,
-           SUM(CASE WHEN DESFECHO = 'Óbito' THEN 1 ELSE 0 END) as deaths
-    FROM srag_casos
-    WHERE DATA_NOTIFICACAO IS NOT NULL
-    GROUP BY month
-    ORDER BY month DESC
-    """
-    df = query_sqlite(db_path, sql)
+    as_of = _resolve_as_of(db_path, as_of)
+    df = query_sqlite(db_path, CONSULTAS["monthly_deaths"], params=(_mes(as_of),))
     df["month"] = pd.to_datetime(df["month"] + "-01")
     df = df.sort_values("month")
     return df
 
 
-def _monthly_vaccination_covid_series(db_path):
+def _monthly_vaccination_covid_series(db_path, as_of=None):
     """Retorna série de vacinação COVID mensais"""
-    sql = """
-    SELECT strftime('%Y-%m', DATA_NOTIFICACAO) as month,
-           SUM(CASE WHEN VACINADO_COVID = 'Sim' THEN 1 ELSE 0 END) as vaccinated
-    FROM srag_casos
-    WHERE DATA_NOTIFICACAO IS NOT NULL
-    GROUP BY month
-    ORDER BY month DESC
-    """
-    df = query_sqlite(db_path, sql)
+    as_of = _resolve_as_of(db_path, as_of)
+    df = query_sqlite(db_path, CONSULTAS["monthly_vaccination_covid"], params=(_mes(as_of),))
     df["month"] = pd.to_datetime(df["month"] + "-01")
     df = df.sort_values("month")
     return df
 
 
-def _monthly_vaccination_gripe_series(db_path):
+def _monthly_vaccination_gripe_series(db_path, as_of=None):
     """Retorna série de vacinação GRIPE mensais"""
-    sql = """
-    SELECT strftime('%Y-%m', DATA_NOTIFICACAO) as month,
-           SUM(CASE WHEN VACINADO_GRIPE = 'Sim' THEN 1 ELSE 0 END) as vaccinated
-    FROM srag_casos
-    WHERE DATA_NOTIFICACAO IS NOT NULL
-    GROUP BY month
-    ORDER BY month DESC
-    """
-    df = query_sqlite(db_path, sql)
+    as_of = _resolve_as_of(db_path, as_of)
+    df = query_sqlite(db_path, CONSULTAS["monthly_vaccination_gripe"], params=(_mes(as_of),))
     df["month"] = pd.to_datetime(df["month"] + "-01")
     df = df.sort_values("month")
     return df
 
 
-def _monthly_case_pacient_sex(db_path):
+def _monthly_case_pacient_sex(db_path, as_of=None):
     """Retorna série mensal de casos por sexo do paciente"""
-    sql = """
-      SELECT strftime('%Y-%m', DATA_NOTIFICACAO) as month,
-         SUM(CASE WHEN "SEXO_PACIENTE" = 'Masculino' THEN 1 ELSE 0 END) as count_homens,
-         SUM(CASE WHEN "SEXO_PACIENTE" = 'Feminino' THEN 1 ELSE 0 END) as count_mulheres
-      FROM srag_casos
-      WHERE DATA_NOTIFICACAO IS NOT NULL
-      GROUP BY month
-      ORDER BY month DESC
-    """
-    df = query_sqlite(db_path, sql)
+    as_of = _resolve_as_of(db_path, as_of)
+    df = query_sqlite(db_path, CONSULTAS["monthly_cases_by_sex"], params=(_mes(as_of),))
     df["month"] = pd.to_datetime(df["month"] + "-01")
     df = df.sort_values("month")
     return df
 
 
-def _monthly_uti_occupation_series(db_path):
+def _monthly_uti_occupation_series(db_path, as_of=None):
     """Retorna série mensal de ocupação de UTI"""
-    sql = """
-      SELECT strftime('%Y-%m', DATA_NOTIFICACAO) as month,
-             SUM(CASE WHEN INTERNADO_UTI = 'Sim' THEN 1 ELSE 0 END) as uti_occupied
-      FROM srag_casos
-      WHERE DATA_NOTIFICACAO IS NOT NULL
-      GROUP BY month
-      ORDER BY month DESC
-    """
-    df = query_sqlite(db_path, sql)
+    as_of = _resolve_as_of(db_path, as_of)
+    df = query_sqlite(db_path, CONSULTAS["monthly_uti_occupation"], params=(_mes(as_of),))
     df["month"] = pd.to_datetime(df["month"] + "-01")
     df = df.sort_values("month")
     return df
 
 
-def _monthly_categorical_distribution_series(db_path):
+def _monthly_categorical_distribution_series(db_path, as_of=None, incluir_sem_data=None):
     """Retorna série mensal de distribuição de categoria de srag."""
-    sql = """
-      SELECT
-          CLASSIFICACAO_FINAL,
-          strftime('%Y-%m', DATA_NOTIFICACAO) AS month,
-          COUNT(*) AS total_casos
-      FROM srag_casos
-      GROUP BY CLASSIFICACAO_FINAL, month
-      ORDER BY month, total_casos DESC;
-    """
-    df = query_sqlite(db_path, sql)
+    params = (_mes(_resolve_as_of(db_path, as_of)), _inclui_sem_data(as_of, incluir_sem_data))
+    df = query_sqlite(db_path, CONSULTAS["monthly_classificacao"], params=params)
     df["month"] = pd.to_datetime(df["month"] + "-01")
     df = df.sort_values("month")
     return df
 
 
-def _monthly_case_results_distribution_series(db_path):
+def _monthly_case_results_distribution_series(db_path, as_of=None, incluir_sem_data=None):
     """Retorna série mensal de distribuição de desfecho dos casos."""
-    sql = """
-      SELECT
-          DESFECHO,
-          strftime('%Y-%m', DATA_NOTIFICACAO) AS month,
-          COUNT(*) AS total_casos
-      FROM srag_casos
-      GROUP BY DESFECHO, month
-      ORDER BY month, total_casos DESC;
-    """
-    df = query_sqlite(db_path, sql)
+    params = (_mes(_resolve_as_of(db_path, as_of)), _inclui_sem_data(as_of, incluir_sem_data))
+    df = query_sqlite(db_path, CONSULTAS["monthly_desfecho"], params=params)
     df["month"] = pd.to_datetime(df["month"] + "-01")
     df = df.sort_values("month")
     return df
 
 
-def _monthly_cases_by_uf_series(db_path):
+def _monthly_cases_by_uf_series(db_path, as_of=None, incluir_sem_data=None):
     """Retorna série mensal de casos por UF."""
-    sql = """
-      SELECT
-          UF,
-          strftime('%Y-%m', DATA_NOTIFICACAO) AS month,
-          COUNT(*) AS total_casos
-      FROM srag_casos
-      GROUP BY UF, month
-      ORDER BY month, total_casos DESC;
-    """
-    df = query_sqlite(db_path, sql)
+    params = (_mes(_resolve_as_of(db_path, as_of)), _inclui_sem_data(as_of, incluir_sem_data))
+    df = query_sqlite(db_path, CONSULTAS["monthly_cases_by_uf"], params=params)
     df["month"] = pd.to_datetime(df["month"] + "-01")
     df = df.sort_values("month")
     return df
 
 
-def _compute_metrics(db_path) -> Dict[str, Any]:
-    """Computa métricas principais a partir do DB."""
-    sql_last_14 = """
-    SELECT
-      DATA_NOTIFICACAO as date, COUNT(*) as cases
-    FROM srag_casos
-    WHERE DATA_NOTIFICACAO IS NOT NULL
-    GROUP BY DATA_NOTIFICACAO
-    ORDER BY DATA_NOTIFICACAO DESC
-    LIMIT 14
-    """
+# Contagens condicionais calculadas na varredura única (coluna -> condição SQL)
+_CONTAGENS_CONDICIONAIS = {
+    "deaths": "DESFECHO = 'Óbito'",
+    "uti": "INTERNADO_UTI = 'Sim'",
+    "vac_covid": "VACINADO_COVID = 'Sim'",
+    "vac_gripe": "VACINADO_GRIPE = 'Sim'",
+    "count_homens": "SEXO_PACIENTE = 'Masculino'",
+    "count_mulheres": "SEXO_PACIENTE = 'Feminino'",
+}
 
-    # taxa de aumento: (sum últimos 7 dias)/(sum 7 dias anteriores) - 1
-    df14 = query_sqlite(db_path, sql_last_14)
-    df14["date"] = pd.to_datetime(df14["date"])
-    df14 = df14.sort_values("date")
-    last7 = df14["cases"].tail(7).sum() if len(df14) >= 7 else df14["cases"].sum()
-    prev7 = df14["cases"].head(7).sum() if len(df14) >= 14 else 0
+# Distribuições categóricas também obtidas na mesma varredura (prefixo -> coluna, valores)
+_DISTRIBUICOES = {
+    "clas": ("CLASSIFICACAO_FINAL", list(MAP_CLAS_FIN.values())),
+    "desf": ("DESFECHO", list(MAP_EVOLUCAO.values())),
+}
 
-    taxa_aumento = ((last7 - prev7) / prev7 * 100) if prev7 > 0 else None
 
-    # taxa de mortalidade
-    sql_mortalidade = """
-    SELECT
-      SUM(CASE WHEN DESFECHO = 'Óbito' THEN 1 ELSE 0 END) as deaths,
-      COUNT(*) as total
-    FROM srag_casos
+def _fused_sql(por_uf: bool = False) -> str:
     """
-    dfm = query_sqlite(db_path, sql_mortalidade)
-    deaths = int(dfm.at[0, "deaths"])
-    total = int(dfm.at[0, "total"])
-    taxa_mortalidade = (deaths / total * 100) if total > 0 else None
-
-    # taxa ocupacao UTI
-    sql_uti = """
+    Monta a consulta multi-agregada diária usada pelo motor fundido. Com por_uf, agrupa
+    também por UF (segunda coluna da chave primária: sem B-tree temporária).
+    """
+    agregados = ["SUM(CASOS) as cases"]
+    for alias, condicao in _CONTAGENS_CONDICIONAIS.items():
+        agregados.append(f"SUM(CASE WHEN {condicao} THEN CASOS ELSE 0 END) as {alias}")
+    for prefixo, (coluna, valores) in _DISTRIBUICOES.items():
+        for j, valor in enumerate(valores):
+            agregados.append(
+                f"SUM(CASE WHEN {coluna} = '{valor}' THEN CASOS ELSE 0 END) as {prefixo}_{j}"
+            )
+    if por_uf:
+        agregados.insert(0, "UF as uf")
+    colunas = ",\n      ".join(agregados)
+    grupos = "DATA_NOTIFICACAO, UF" if por_uf else "DATA_NOTIFICACAO"
+    return f"""
     SELECT
-      SUM(CASE WHEN INTERNADO_UTI = 'Sim' THEN 1 ELSE 0 END) as uti,
-      COUNT(*) as total
-    FROM srag_casos
+      NULLIF(DATA_NOTIFICACAO, '') as date,
+      {colunas}
+    FROM srag_diario
+    WHERE DATA_NOTIFICACAO <= ? AND (DATA_NOTIFICACAO > '' OR ?)
+    GROUP BY {grupos}
     """
-    dfu = query_sqlite(db_path, sql_uti)
-    uti = int(dfu.at[0, "uti"])
-    total2 = int(dfu.at[0, "total"])
-    taxa_uti = (uti / total2 * 100) if total2 > 0 else None
 
-    # taxa de vacinação (COVID): proporção VACINADO_COVID == 'Sim'
-    sql_vac = """
-    SELECT
-      SUM(CASE WHEN VACINADO_COVID = 'Sim' THEN 1 ELSE 0 END) as vac,
-      COUNT(*) as total
-    FROM srag_casos
+
+CONSULTAS["fused_daily_aggregate"] = _fused_sql()
+CONSULTAS["fused_daily_aggregate_uf"] = _fused_sql(por_uf=True)
+
+
+def _fused_daily_aggregate(db_path, as_of=None, incluir_sem_data=None) -> pd.DataFrame:
+    """
+    Varre a rollup diária (até as_of) uma única vez e retorna todas as contagens por
+    dia. A linha sem DATA_NOTIFICACAO entra conforme _inclui_sem_data.
     """
-    dfv = query_sqlite(db_path, sql_vac)
-    vac = int(dfv.at[0, "vac"])
-    total3 = int(dfv.at[0, "total"])
-    taxa_vacinacao = (vac / total3 * 100) if total3 > 0 else None
+    params = (_dia(_resolve_as_of(db_path, as_of)), _inclui_sem_data(as_of, incluir_sem_data))
+    df = query_sqlite(db_path, CONSULTAS["fused_daily_aggregate"], params=params)
+    df["date"] = pd.to_datetime(df["date"])
+    return df.sort_values("date", na_position="first").reset_index(drop=True)
+
+
+def _fused_daily_aggregate_uf(db_path, as_of=None, incluir_sem_data=None) -> pd.DataFrame:
+    """Como _fused_daily_aggregate, com uma linha por dia e UF (coluna `uf`)."""
+    params = (_dia(_resolve_as_of(db_path, as_of)), _inclui_sem_data(as_of, incluir_sem_data))
+    df = query_sqlite(db_path, CONSULTAS["fused_daily_aggregate_uf"], params=params)
+    df["date"] = pd.to_datetime(df["date"])
+    return df.sort_values(["date", "uf"], na_position="first").reset_index(drop=True)
+
+
+def _nacional_from_uf(agg_uf: pd.DataFrame) -> pd.DataFrame:
+    """Soma o agregado por UF no agregado nacional (inclui UF não informada)."""
+    agg = agg_uf.drop(columns="uf").groupby("date", dropna=False, sort=False).sum()
+    return agg.reset_index().sort_values("date", na_position="first").reset_index(drop=True)
+
+
+def _monthly_from_daily(dated: pd.DataFrame) -> pd.DataFrame:
+    """Consolida o agregado diário (já sem datas nulas) em agregado mensal."""
+    month = dated["date"].dt.to_period("M").dt.to_timestamp()
+    monthly = dated.drop(columns="date").groupby(month).sum()
+    monthly.index.name = "month"
+    return monthly.reset_index().sort_values("month")
+
+
+def _distribution_from_monthly(monthly: pd.DataFrame, prefixo: str) -> pd.DataFrame:
+    """Converte as colunas condicionais de uma distribuição para o formato longo."""
+    coluna, valores = _DISTRIBUICOES[prefixo]
+    df = monthly[["month"] + [f"{prefixo}_{j}" for j in range(len(valores))]]
+    df = df.rename(columns={f"{prefixo}_{j}": v for j, v in enumerate(valores)})
+    df = df.melt(id_vars="month", var_name=coluna, value_name="total_casos")
+    df = df[df["total_casos"] > 0]
+    df = df.sort_values(["month", "total_casos"], ascending=[True, False])
+    return df[[coluna, "month", "total_casos"]].reset_index(drop=True)
+
+
+def _series_from_aggregate(agg: pd.DataFrame, as_of: pd.Timestamp) -> Dict[str, pd.DataFrame]:
+    """Deriva todas as séries diárias e mensais a partir do agregado fundido."""
+    dated = agg[agg["date"].notna()]
+    monthly = _monthly_from_daily(dated)
+
+    # janelas recentes de calendário terminadas em as_of
+    inicio_diario = pd.Timestamp(_janela_diaria(as_of, JANELA_DIARIA)[0])
+    inicio_mensal = pd.Timestamp(_janela_mensal(as_of, JANELA_MENSAL)[0] + "-01")
+
+    return {
+        "daily_cases": dated.loc[dated["date"] >= inicio_diario, ["date", "cases"]],
+        "monthly_cases": monthly.loc[monthly["month"] >= inicio_mensal, ["month", "cases"]],
+        "monthly_cases_all": monthly[["month", "cases"]],
+        "monthly_deaths": monthly[["month", "deaths"]],
+        "monthly_vaccination_covid": monthly[["month", "vac_covid"]].rename(
+            columns={"vac_covid": "vaccinated"}
+        ),
+        "monthly_vaccination_gripe": monthly[["month", "vac_gripe"]].rename(
+            columns={"vac_gripe": "vaccinated"}
+        ),
+        "monthly_cases_by_sex": monthly[["month", "count_homens", "count_mulheres"]],
+        "monthly_uti_occupation": monthly[["month", "uti"]].rename(columns={"uti": "uti_occupied"}),
+        "monthly_classificacao": _distribution_from_monthly(monthly, "clas"),
+        "monthly_desfecho": _distribution_from_monthly(monthly, "desf"),
+    }
+
+
+def _metrics_from_aggregate(agg: pd.DataFrame, as_of: pd.Timestamp) -> Dict[str, Any]:
+    """Calcula as métricas principais a partir do agregado fundido."""
+    # taxa de aumento: (sum últimos 7 dias)/(sum 7 dias anteriores) - 1
+    taxa_aumento = _taxa_aumento(agg[agg["date"].notna()], as_of)
+
+    # totais incluem registros sem data de notificação
+    total = int(agg["cases"].sum())
+    deaths = int(agg["deaths"].sum())
+    uti = int(agg["uti"].sum())
+    vac = int(agg["vac_covid"].sum())
 
     return {
         "taxa_aumento_percent": taxa_aumento,
-        "taxa_mortalidade_percent": taxa_mortalidade,
-        "taxa_uti_percent": taxa_uti,
-        "taxa_vacinacao_percent": taxa_vacinacao,
+        "taxa_mortalidade_percent": (deaths / total * 100) if total > 0 else None,
+        "taxa_uti_percent": (uti / total * 100) if total > 0 else None,
+        "taxa_vacinacao_percent": (vac / total * 100) if total > 0 else None,
         "counts": {"deaths": deaths, "total": total},
     }
 
 
-def data_agent_func(context: Dict) -> Dict:
+# Colunas acumuladas pelo backfill (as que entram nas métricas principais)
+_COLUNAS_BACKFILL = ["cases", "deaths", "uti", "vac_covid"]
+
+
+def _backfill_from_aggregate(agg: pd.DataFrame, datas: pd.DatetimeIndex) -> List[Dict]:
     """
-    Agent que consulta o DB e retorna métricas e séries para o relatório.
-    Retorna dict que será mesclado no contexto.
+    Métricas e séries recentes de cada data de `datas` (ordenadas) a partir do agregado
+    fundido. Somas cumulativas sobre o calendário diário denso: toda janela (7, 14 e 30
+    dias, meses, histórico até as_of) é a diferença de dois acumulados.
     """
-    db_path = context.get("db_path", DB_PATH)
+    dated = agg[agg["date"].notna()]
+    sem_data = agg.loc[agg["date"].isna(), _COLUNAS_BACKFILL].sum().to_numpy(dtype=np.int64)
+
+    inicio = min(dated["date"].min(), datas[0]) if len(dated) else datas[0]
+    calendario = pd.date_range(inicio, datas[-1], freq="D")
+    diario = dated.set_index("date")[_COLUNAS_BACKFILL].reindex(calendario, fill_value=0)
+    # acum[k] / presenca[k]: somas e dias com registro nos k primeiros dias do calendário
+    acum = np.zeros((len(calendario) + 1, len(_COLUNAS_BACKFILL)), dtype=np.int64)
+    acum[1:] = diario.to_numpy(dtype=np.int64).cumsum(axis=0)
+    presenca = np.zeros(len(calendario) + 1, dtype=np.int64)
+    presenca[1:] = calendario.isin(dated["date"]).cumsum()
+
+    def ate(limite):  # quantidade de dias do calendário <= limite
+        return calendario.searchsorted(limite, side="right")
+
+    fim = ate(datas)
+    semana = ate(datas - pd.Timedelta(days=JANELA_CRESCIMENTO))
+    quinzena = ate(datas - pd.Timedelta(days=2 * JANELA_CRESCIMENTO))
+
+    # taxa de aumento: (sum últimos 7 dias)/(sum 7 dias anteriores) - 1
+    last7 = acum[fim, 0] - acum[semana, 0]
+    prev7 = acum[semana, 0] - acum[quinzena, 0]
+    totais = acum[fim] + sem_data  # totais incluem registros sem data de notificação
+
+    # série mensal: casos de cada um dos 12 meses terminados no mês de as_of (parcial)
+    mes_atual = datas.to_period("M")
+    casos_mes = np.zeros((len(datas), JANELA_MENSAL), dtype=np.int64)
+    dias_mes = np.zeros((len(datas), JANELA_MENSAL), dtype=np.int64)
+    meses = []
+    for k in range(JANELA_MENSAL):
+        mes = mes_atual - (JANELA_MENSAL - 1 - k)
+        a = calendario.searchsorted(mes.to_timestamp(), side="left")
+        b = np.maximum(np.minimum(calendario.searchsorted((mes + 1).to_timestamp()), fim), a)
+        casos_mes[:, k] = acum[b, 0] - acum[a, 0]
+        dias_mes[:, k] = presenca[b] - presenca[a]
+        meses.append(mes.to_timestamp())
+
+    # série diária: dias com registro na janela de 30 dias (como em data_agent_func)
+    dias = dated["date"].to_numpy()
+    casos_dia = dated["cases"].to_numpy()
+    ini_30 = dias.searchsorted((datas - pd.Timedelta(days=JANELA_DIARIA - 1)).to_numpy())
+    fim_30 = dias.searchsorted(datas.to_numpy(), side="right")
+
+    resultados = []
+    for i, as_of in enumerate(datas):
+        janela = slice(ini_30[i], fim_30[i])
+        total, deaths, uti, vac = (int(v) for v in totais[i])
+        resultados.append(
+            {
+                "as_of": _dia(as_of),
+                "daily_cases": [
+                    {"date": pd.Timestamp(d), "cases": int(c)}
+                    for d, c in zip(dias[janela], casos_dia[janela], strict=True)
+                ],
+                "monthly_cases": [
+                    {"month": meses[k][i], "cases": int(casos_mes[i, k])}
+                    for k in range(JANELA_MENSAL)
+                    if dias_mes[i, k] > 0
+                ],
+                "metrics": {
+                    "taxa_aumento_percent": (
+                        (last7[i] - prev7[i]) / prev7[i] * 100 if prev7[i] > 0 else None
+                    ),
+                    "taxa_mortalidade_percent": (deaths / total * 100) if total > 0 else None,
+                    "taxa_uti_percent": (uti / total * 100) if total > 0 else None,
+                    "taxa_vacinacao_percent": (vac / total * 100) if total > 0 else None,
+                    "counts": {"deaths": deaths, "total": total},
+                },
+            }
+        )
+    return resultados
+
+
+def backfill_metricas(db_path, datas, incluir_sem_data=False) -> List[Dict]:
+    """
+    Métricas principais e séries de 30 dias/12 meses para várias datas de referência,
+    como `data_agent_func` devolveria para cada uma (com as_of explícito), com uma
+    única varredura da rollup diária (até a maior data) em vez de uma agregação por
+    data. Por padrão os registros sem data ficam de fora (ver _inclui_sem_data).
+    """
+    datas = pd.DatetimeIndex(pd.to_datetime(list(datas))).normalize().unique().sort_values()
+    if datas.empty:
+        return []
+    agg = _fused_daily_aggregate(db_path, datas[-1], incluir_sem_data)
+    return _backfill_from_aggregate(agg, datas)
+
+
+def _contexto_from_aggregate(agg: pd.DataFrame, as_of: pd.Timestamp) -> Dict:
+    """Séries e métricas do relatório (formato do contexto da Crew) a partir do agregado."""
+    series = _series_from_aggregate(agg, as_of)
 
     # séries básicas
-    daily = _daily_series_last_30(db_path)
-    monthly = _monthly_cases_series_last_12(db_path)
-
-    # séries adicionais
-    monthly_all = _monthly_cases_series(db_path)
-    # monthly_deaths = _monthly_deaths_series(db_path)
-    # monthly_vacc_covid = _monthly_vaccination_covid_series(db_path)
-    # monthly_vacc_gripe = _monthly_vaccination_gripe_series(db_path)
-    monthly_sex = _monthly_case_pacient_sex(db_path)
-    # monthly_uti = _monthly_uti_occupation_series(db_path)
-    # monthly_classificacao = _monthly_categorical_distribution_series(db_path)
-    # monthly_desfecho = _monthly_case_results_distribution_series(db_path)
-    # monthly_uf = _monthly_cases_by_uf_series(db_path)
+    daily = series["daily_cases"]
+    monthly = series["monthly_cases"]
+
+    # séries adicionais (derivadas em memória, sem novas consultas)
+    monthly_all = series["monthly_cases_all"]
+    # monthly_deaths = series["monthly_deaths"]
+    # monthly_vacc_covid = series["monthly_vaccination_covid"]
+    # monthly_vacc_gripe = series["monthly_vaccination_gripe"]
+    monthly_sex = series["monthly_cases_by_sex"]
+    # monthly_uti = series["monthly_uti_occupation"]
+    # monthly_classificacao = series["monthly_classificacao"]
+    # monthly_desfecho = series["monthly_desfecho"]
+    # monthly_uf = _monthly_cases_by_uf_series(db_path, as_of)
 
     # métricas gerais
-    metrics = _compute_metrics(db_path)
+    metrics = _metrics_from_aggregate(agg, as_of)
 
-    # Atualiza contexto da Crew com os dados extraídos
     context_update = {
+        "as_of": _dia(as_of),
         "daily_cases": daily.to_dict(orient="records"),
         "monthly_cases": monthly.to_dict(orient="records"),
         # novas métricas integradas
@@ -298,3 +546,49 @@ def data_agent_func(context: Dict) -> Dict:
     }
 
     return context_update
+
+
+def data_agent_func(context: Dict) -> Dict:
+    """
+    Agent que consulta o DB e retorna métricas e séries para o relatório.
+    Todas as séries e métricas saem de uma única varredura da rollup diária.
+    `context["as_of"]` (data 'AAAA-MM-DD') gera o relatório como se fosse nessa
+    data; por padrão é a última data de notificação carregada.
+    `context["incluir_sem_data"]` decide se os registros sem data entram nos totais
+    (padrão: só sem as_of, ver _inclui_sem_data).
+    Retorna dict que será mesclado no contexto.
+    """
+    db_path = context.get("db_path", DB_PATH)
+    incluir = _inclui_sem_data(context.get("as_of"), context.get("incluir_sem_data"))
+    as_of = _resolve_as_of(db_path, context.get("as_of"))
+
+    # varredura única: agregado diário multi-métrica (até as_of)
+    agg = _fused_daily_aggregate(db_path, as_of, incluir)
+
+    # Atualiza contexto da Crew com os dados extraídos
+    context_update = _contexto_from_aggregate(agg, as_of)
+    return context_update
+
+
+def data_agent_uf_func(context: Dict) -> Dict:
+    """
+    Versão por UF do Data Agent: uma única varredura agrupada por dia e UF gera o
+    contexto de cada estado (mesmo formato de data_agent_func) em `por_uf`, e o
+    nacional (soma das UFs) nas chaves de sempre. `context["ufs"]` restringe os estados.
+    """
+    db_path = context.get("db_path", DB_PATH)
+    incluir = _inclui_sem_data(context.get("as_of"), context.get("incluir_sem_data"))
+    as_of = _resolve_as_of(db_path, context.get("as_of"))
+
+    agg_uf = _fused_daily_aggregate_uf(db_path, as_of, incluir)
+    context_update = _contexto_from_aggregate(_nacional_from_uf(agg_uf), as_of)
+
+    # registros sem UF entram só no agregado nacional
+    ufs = context.get("ufs") or sorted(uf for uf in agg_uf["uf"].unique() if uf)
+    grupos = dict(list(agg_uf.drop(columns="uf").groupby(agg_uf["uf"], sort=False)))
+    context_update["por_uf"] = {
+        uf: _contexto_from_aggregate(grupos[uf].reset_index(drop=True), as_of)
+        for uf in ufs
+        if uf in grupos
+    }
+    return context_update
@@ -1,12 +1,12 @@
-import os
 from typing import Dict
 
 from dotenv import load_dotenv
-from groq import Groq
-from langfuse import observe
+
+from src.tools.llm_cache import chat_completion
+from src.tools.llm_client import get_groq_client
+from src.tools.tracing import observe
 
 load_dotenv()
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
 
 
 @observe(name="NewsAgent")
@@ -54,8 +54,10 @@ def news_agent_func(context: Dict) -> Dict:
         URL: https://www.gov.br/boletim-srag
     """
 
-    # Chama o modelo Groq com capacidade de busca na web
-    response = client.chat.completions.create(
+    # Chama o modelo Groq com capacidade de busca na web (com cache de TTL curto)
+    response = chat_completion(
+        get_groq_client(),
+        "news",
         model="groq/compound",
         messages=[
             {"role": "system", "content": system_prompt},
@@ -1,48 +1,44 @@
+import contextvars
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Dict
 
-import matplotlib.pyplot as plt
-import pandas as pd
-import seaborn as sns
 from dotenv import load_dotenv
-from groq import Groq
-from langfuse import observe
 
 from src.agents.news_agent import news_agent_func
+from src.tools.llm_cache import chat_completion
+from src.tools.llm_client import get_groq_client, stream_chat
+from src.tools.plot_tool import plot_pool, submete_plot
+from src.tools.prompt_payload import codifica_payload
+from src.tools.tracing import observe
 
 # Carrega variáveis de ambiente
 load_dotenv()
 
-# Inicializa o cliente Groq
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-
 # Diretório de saída dos relatórios
 OUTPUT_DIR = os.path.join(os.getcwd(), "reports")
-os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+# Modelo da análise de métricas
+METRICS_MODEL = "openai/gpt-oss-120b"
 
-def _plot_series(series_records, x_key, y_key, outpath, title):
-    """Gera e salva um gráfico de linha a partir de uma série temporal."""
-    df = pd.DataFrame(series_records)
-    df[x_key] = pd.to_datetime(df[x_key])
+# Streaming: a análise é gravada no relatório à medida que é gerada
+STREAMING = os.getenv("SRAG_REPORT_STREAMING", "0") == "1"
 
-    # Configurações do gráfico
-    sns.set_theme(style="whitegrid")
-    plt.figure(figsize=(10, 4))
-    sns.lineplot(data=df, x=x_key, y=y_key, marker="o")
-    plt.title(title)
-    plt.xlabel("")
-    plt.tight_layout()
-    plt.savefig(outpath)
-    plt.close()
+# Relatórios por UF: chamadas simultâneas ao LLM (análises de todos os estados)
+UF_CONCORRENCIA = int(os.getenv("SRAG_UF_CONCORRENCIA", "4"))
 
-    return outpath
+# Consulta de notícias usada no relatório
+NEWS_QUERY = "Síndrome Respiratória Aguda Grave OR SRAG OR surtos respiratórios Brasil 2025"
 
 
-@observe(name="Groq_Metrics_Analysis")
-def _analyze_metrics_with_groq(metrics: dict, task: str) -> str:
-    """Gera uma interpretação textual das métricas usando Groq."""
+def _em_thread(pool, func, *args, **kwargs):
+    """Submete func ao pool preservando o contexto de tracing da thread atual."""
+    return pool.submit(contextvars.copy_context().run, func, *args, **kwargs)
+
+
+def _metrics_messages(metrics: dict, task: str) -> list:
+    """Mensagens (system + user) da análise de métricas para a tarefa pedida."""
 
     # Prompts para tarefa inicial com 12 meses de dados para gerar contexto
     system_prompt_summary = """
@@ -64,44 +60,128 @@ def _analyze_metrics_with_groq(metrics: dict, task: str) -> str:
     entre si quando possível.
     """
 
-    # Prompt do usuário com as métricas em formato JSON.
-    user_prompt = f"Métricas obtidas: {metrics}"
-
-    # Task de análise específica de 12 meses
-    if task == "summary":
-        response = client.chat.completions.create(
-            model="openai/gpt-oss-120b",
-            messages=[
-                {"role": "system", "content": system_prompt_summary},
-                {"role": "user", "content": user_prompt},
-            ],
-            temperature=0.1,
-        )
-
-    # Task de análise detalhada de todas as métricas
-    elif task == "All_metrics_analysis":
-        response = client.chat.completions.create(
-            model="openai/gpt-oss-120b",
-            messages=[
-                {"role": "system", "content": system_prompt_all_metrics},
-                {"role": "user", "content": user_prompt},
-            ],
-            temperature=0.1,
-        )
+    # Prompt da análise de um estado (relatórios por UF)
+    system_prompt_uf = """
+    Você é um especialista em epidemiologia e análise de dados em saúde
+    pública.
+    Analise a situação da SRAG no estado (UF) indicado em `uf`. Os dados em
+    `metrics` e nas séries mensais referem-se somente a esse estado; `metrics_brasil`
+    traz as mesmas métricas para o Brasil inteiro.
+    Detalhe cada métrica do estado, identifique tendências e compare-as com as
+    nacionais, apontando onde o estado está acima ou abaixo do país. Nomeie o
+    estado na análise.
+    """
+
+    system_prompts = {
+        # Task de análise específica de 12 meses
+        "summary": system_prompt_summary,
+        # Task de análise detalhada de todas as métricas
+        "All_metrics_analysis": system_prompt_all_metrics,
+        # Task de análise de um estado contra o Brasil
+        "UF_metrics_analysis": system_prompt_uf,
+    }
+
+    # Prompt do usuário com as métricas em formato compacto (séries em CSV)
+    user_prompt = f"Métricas obtidas:\n{codifica_payload(metrics)}"
+
+    return [
+        {"role": "system", "content": system_prompts[task]},
+        {"role": "user", "content": user_prompt},
+    ]
+
+
+@observe(name="Groq_Metrics_Analysis")
+def _analyze_metrics_with_groq(metrics: dict, task: str) -> str:
+    """Gera uma interpretação textual das métricas usando Groq."""
+    response = chat_completion(
+        get_groq_client(),
+        "metrics_analysis",
+        model=METRICS_MODEL,
+        messages=_metrics_messages(metrics, task),
+        temperature=0.1,
+    )
     return response.choices[0].message.content.strip()
 
 
-@observe(name="ReportAggent")
-def report_agent_func(context: Dict) -> Dict:
+@observe(name="Groq_Metrics_Analysis_Stream")
+def _stream_metrics_analysis(metrics: dict, task: str, on_progress=None):
+    """Versão em streaming de _analyze_metrics_with_groq: gera os trechos do texto."""
+    yield from stream_chat(
+        get_groq_client(),
+        on_progress=on_progress,
+        etapa="analise_metricas",
+        model=METRICS_MODEL,
+        messages=_metrics_messages(metrics, task),
+        temperature=0.1,
+    )
+
+
+def _imprime_progresso(evento: dict):
+    """Callback padrão de progresso do streaming."""
+    if evento["evento"] == "primeiro_token":
+        print(f"[{evento['etapa']}] primeiro token em {evento['ttft_s']:.2f}s")
+    elif evento["evento"] == "concluido":
+        print(f"[{evento['etapa']}] geração concluída em {evento['duracao_s']:.2f}s")
+
+
+class _Relatorio:
     """
-    Gera relatório Markdown com:
-    - métricas e análise via Groq
-    - gráficos
-    - resumo e análise de notícias via Groq - web search
+    Acumula as peças do Markdown (separadas por quebra de linha). No modo
+    incremental cada peça é gravada e descarregada no arquivo assim que chega,
+    para que o relatório possa ser acompanhado durante a geração.
     """
+
+    def __init__(self, path: str, incremental: bool):
+        self.path = path
+        self.pecas = []
+        self._arquivo = open(path, "w", encoding="utf-8") if incremental else None
+
+    def _escreve(self, texto: str):
+        self._arquivo.write(texto)
+        self._arquivo.flush()
+
+    def append(self, texto: str):
+        if self._arquivo is not None:
+            self._escreve(("\n" if self.pecas else "") + texto)
+        self.pecas.append(texto)
+
+    def append_stream(self, trechos, sufixo: str = "") -> str:
+        """Grava uma peça trecho a trecho; retorna o texto completo."""
+        recebidos = []
+        pendente = ""  # espaços finais retidos: o texto completo sai sem strip() à direita
+        if self._arquivo is not None and self.pecas:
+            self._escreve("\n")
+        for trecho in trechos:
+            if not recebidos:
+                trecho = trecho.lstrip()
+            conteudo = trecho.rstrip()
+            if not conteudo:
+                pendente += trecho
+                continue
+            trecho, pendente = pendente + trecho[: len(conteudo)], trecho[len(conteudo) :]
+            recebidos.append(trecho)
+            if self._arquivo is not None:
+                self._escreve(trecho)
+        texto = "".join(recebidos)
+        if self._arquivo is not None:
+            self._escreve(sufixo)
+        self.pecas.append(texto + sufixo)
+        return texto
+
+    def fecha(self, concluido: bool = True):
+        """Grava o relatório (modo normal) ou fecha o arquivo (modo incremental)."""
+        if self._arquivo is not None:
+            self._arquivo.close()
+        elif concluido:
+            with open(self.path, "w", encoding="utf-8") as f:
+                f.write("\n".join(self.pecas))
+
+
+def _contexto_ia(context: Dict) -> Dict:
+    """Dados do contexto enviados ao LLM na análise das métricas."""
     metrics = context.get("metrics", {})
-    daily = context.get("daily_cases", [])
-    monthly = context.get("monthly_cases", [])
+    # daily = context.get("daily_cases", [])
+    # monthly = context.get("monthly_cases", [])
 
     # séries adicionais
     monthly_all = context.get("monthly_cases_all", [])
@@ -114,7 +194,7 @@ def report_agent_func(context: Dict) -> Dict:
     # monthly_desfecho = context.get("monthly_desfecho", [])
     # monthly_uf = context.get("monthly_cases_by_uf", [])
 
-    full_context_for_ai = {
+    return {
         "metrics": metrics,
         # "daily_cases": daily,
         # "monthly_cases": monthly,
@@ -129,55 +209,47 @@ def report_agent_func(context: Dict) -> Dict:
         # "monthly_cases_by_uf": monthly_uf
     }
 
-    # Busca e interpretar notícias
-    print("Buscando notícias recentes sobre SRAG...")
-    news_context = {
-        "news_query": "Síndrome Respiratória Aguda Grave OR SRAG OR surtos respiratórios Brasil 2025"
-    }
-    news_data = news_agent_func(news_context)
 
-    news_summary = news_data.get("news_summary", "")
-    sources = news_data.get("sources", [])
-
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    report_path = os.path.join(OUTPUT_DIR, f"relatorio_srag_{timestamp}.md")
-
-    # Gera análise das métricas com IA de 12 meses
-    metrics_analysis = _analyze_metrics_with_groq(metrics, task="summary")  # noqa: F841
-    all_metrics_analysis = _analyze_metrics_with_groq(
-        full_context_for_ai, task="All_metrics_analysis"
-    )
-
-    # Gráficos
-    daily_img = _plot_series(
-        daily,
+def _submete_graficos(plots, context: Dict, sufixo: str, local: str = ""):
+    """Submete os gráficos diário e mensal ao pool; devolve os dois Futures."""
+    rotulo = f" — {local}" if local else ""
+    daily_fut = submete_plot(
+        plots,
+        context.get("daily_cases", []),
         "date",
         "cases",
-        os.path.join(OUTPUT_DIR, f"daily_{timestamp}.png"),
-        "Casos diários (últimos 30 dias)",
+        os.path.join(OUTPUT_DIR, f"daily_{sufixo}.png"),
+        f"Casos diários{rotulo} (últimos 30 dias)",
     )
-    monthly_img = _plot_series(
-        monthly,
+    monthly_fut = submete_plot(
+        plots,
+        context.get("monthly_cases", []),
         "month",
         "cases",
-        os.path.join(OUTPUT_DIR, f"monthly_{timestamp}.png"),
-        "Casos mensais (últimos 12 meses)",
+        os.path.join(OUTPUT_DIR, f"monthly_{sufixo}.png"),
+        f"Casos mensais{rotulo} (últimos 12 meses)",
     )
+    return daily_fut, monthly_fut
 
-    # Construção do relatório Markdown
-    md = []
-    md.append("# Relatório Epidemiológico — SRAG\n")
-    md.append(f"**Gerado em:** {datetime.now().strftime('%Y-%m-%d %H:%M')}\n\n")
 
-    md.append("## Métricas e Análise\n")
-    md.append(f"{all_metrics_analysis}\n\n")
+def _cabecalho(md: _Relatorio, context: Dict, local: str = ""):
+    titulo = f"SRAG — {local}" if local else "SRAG"
+    md.append(f"# Relatório Epidemiológico — {titulo}\n")
+    md.append(f"**Gerado em:** {datetime.now().strftime('%Y-%m-%d %H:%M')}\n")
+    if context.get("as_of"):
+        md.append(f"**Dados até:** {context['as_of']}\n")
+    md.append("\n")
 
+
+def _graficos(md: _Relatorio, daily_img, monthly_img):
     md.append("## Gráficos\n")
     if daily_img:
         md.append(f"![Casos diários]({os.path.basename(daily_img)})\n")
     if monthly_img:
         md.append(f"![Casos mensais]({os.path.basename(monthly_img)})\n")
 
+
+def _rodape(md: _Relatorio, news_summary: str):
     # Notícias e análise
     md.append("\n## Notícias recentes e contexto\n")
     md.append(f"{news_summary}\n\n")
@@ -187,8 +259,78 @@ def report_agent_func(context: Dict) -> Dict:
     md.append("- Notícias obtidas via busca em tempo real com o modelo `groq/compound`.\n")
     md.append("- Este relatório foi gerado automaticamente por agentes de IA.\n")
 
-    with open(report_path, "w", encoding="utf-8") as f:
-        f.write("\n".join(md))
+
+@observe(name="ReportAggent")
+def report_agent_func(context: Dict) -> Dict:
+    """
+    Gera relatório Markdown com:
+    - métricas e análise via Groq
+    - gráficos
+    - resumo e análise de notícias via Groq - web search
+    """
+    full_context_for_ai = _contexto_ia(context)
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    report_path = os.path.join(OUTPUT_DIR, f"relatorio_srag_{timestamp}.md")
+
+    # Streaming: o relatório é gravado à medida que a análise chega (context["streaming"]
+    # ou SRAG_REPORT_STREAMING=1); context["on_progress"] recebe o tempo até o 1º token
+    streaming = context.get("streaming", STREAMING)
+    on_progress = context.get("on_progress") or _imprime_progresso
+    md = _Relatorio(report_path, incremental=streaming)
+
+    # Etapas independentes em paralelo: gráficos em processos, chamadas ao LLM em
+    # threads. O relatório é montado quando todas terminam.
+    try:
+        with plot_pool() as plots, ThreadPoolExecutor(max_workers=2) as llm:
+            daily_fut, monthly_fut = _submete_graficos(plots, context, timestamp)
+
+            # Análise detalhada das métricas (a análise "summary" não entra no relatório);
+            # em streaming ela é consumida na thread atual, direto para o arquivo
+            if not streaming:
+                analysis_fut = _em_thread(
+                    llm,
+                    _analyze_metrics_with_groq,
+                    full_context_for_ai,
+                    task="All_metrics_analysis",
+                )
+
+            # Notícias: reaproveita o resultado do NewsAgent quando ele já rodou na Crew
+            if "news_summary" in context:
+                news_fut = None
+            else:
+                print("Buscando notícias recentes sobre SRAG...")
+                news_query = {"news_query": context.get("news_query", NEWS_QUERY)}
+                news_fut = _em_thread(llm, news_agent_func, news_query)
+
+            # Construção do relatório Markdown
+            _cabecalho(md, context)
+
+            md.append("## Métricas e Análise\n")
+            if streaming:
+                md.append_stream(
+                    _stream_metrics_analysis(
+                        full_context_for_ai, task="All_metrics_analysis", on_progress=on_progress
+                    ),
+                    sufixo="\n\n",
+                )
+            else:
+                md.append(f"{analysis_fut.result()}\n\n")
+
+            daily_img = daily_fut.result()
+            monthly_img = monthly_fut.result()
+            _graficos(md, daily_img, monthly_img)
+
+            news_data = context if news_fut is None else news_fut.result()
+
+        news_summary = news_data.get("news_summary", "")
+        sources = news_data.get("sources", [])
+        _rodape(md, news_summary)
+    except BaseException:
+        md.fecha(concluido=False)
+        raise
+    md.fecha()
 
     return {
         "report_path": report_path,
@@ -197,3 +339,70 @@ def report_agent_func(context: Dict) -> Dict:
         "news_summary": news_summary,
         "sources": sources,
     }
+
+
+@observe(name="ReportAgentUF")
+def report_agent_uf_func(context: Dict) -> Dict:
+    """
+    Gera um relatório por UF a partir de `context["por_uf"]` (ver data_agent_uf_func).
+    Os gráficos de todos os estados vão para um único pool de processos e as análises
+    ao LLM rodam com no máximo `uf_concorrencia` chamadas simultâneas. Resultados
+    nacionais são compartilhados: as notícias (buscadas uma vez, ou vindas do
+    NewsAgent) e as métricas do Brasil, enviadas junto às de cada estado.
+    """
+    por_uf = context.get("por_uf", {})
+    concorrencia = max(1, int(context.get("uf_concorrencia") or UF_CONCORRENCIA))
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+    # Notícias em executor próprio: não ocupam vagas das análises por estado
+    with (
+        plot_pool() as plots,
+        ThreadPoolExecutor(max_workers=concorrencia) as llm,
+        ThreadPoolExecutor(max_workers=1) as noticias,
+    ):
+        # Notícias nacionais: uma busca para todos os estados
+        if "news_summary" in context:
+            news_fut = None
+        else:
+            print("Buscando notícias recentes sobre SRAG...")
+            news_query = {"news_query": context.get("news_query", NEWS_QUERY)}
+            news_fut = _em_thread(noticias, news_agent_func, news_query)
+
+        # Todas as etapas são submetidas antes de montar qualquer relatório
+        etapas = {}
+        for uf, dados in sorted(por_uf.items()):
+            # o estado é nomeado no payload; `metrics` é do estado, `metrics_brasil` do país
+            contexto_ia = {
+                "uf": uf,
+                **_contexto_ia(dados),
+                "metrics_brasil": context.get("metrics", {}),
+            }
+            etapas[uf] = (
+                _submete_graficos(plots, dados, f"{uf}_{timestamp}", local=uf),
+                _em_thread(
+                    llm, _analyze_metrics_with_groq, contexto_ia, task="UF_metrics_analysis"
+                ),
+            )
+
+        news_data = context if news_fut is None else news_fut.result()
+        news_summary = news_data.get("news_summary", "")
+
+        reports = {}
+        for uf, ((daily_fut, monthly_fut), analysis_fut) in etapas.items():
+            report_path = os.path.join(OUTPUT_DIR, f"relatorio_srag_{uf}_{timestamp}.md")
+            md = _Relatorio(report_path, incremental=False)
+            _cabecalho(md, por_uf[uf], local=uf)
+            md.append("## Métricas e Análise\n")
+            md.append(f"{analysis_fut.result()}\n\n")
+            _graficos(md, daily_fut.result(), monthly_fut.result())
+            _rodape(md, news_summary)
+            md.fecha()
+            reports[uf] = report_path
+
+    return {
+        "reports_by_uf": reports,
+        "news_summary": news_summary,
+        "sources": news_data.get("sources", []),
+    }
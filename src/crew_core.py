@@ -1,33 +1,132 @@
+import contextvars
 import logging
-from typing import Any, Callable, Dict, List
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from src.tools.instrumentation import cronometro
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("crew")
 
 
 class Agent:
-    def __init__(self, name: str, role_description: str, func: Callable[..., Any]):
+    """
+    Agente da Crew. `inputs` e `outputs` declaram as chaves de contexto lidas e
+    produzidas; quando omitidos, o agente é tratado como barreira (roda após
+    todos os anteriores e antes de todos os seguintes), como na execução sequencial.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        role_description: str,
+        func: Callable[..., Any],
+        inputs: Optional[Iterable[str]] = None,
+        outputs: Optional[Iterable[str]] = None,
+    ):
         self.name = name
         self.role_description = role_description
         self.func = func
+        self.inputs = None if inputs is None else frozenset(inputs)
+        self.outputs = None if outputs is None else frozenset(outputs)
+
+    @property
+    def declared(self) -> bool:
+        return self.inputs is not None and self.outputs is not None
 
     def run(self, **kwargs):
         logger.info(f"[Agent:{self.name}] Starting task...")
-        result = self.func(**kwargs)
+        with cronometro("agent", agente=self.name):
+            result = self.func(**kwargs)
         logger.info(f"[Agent:{self.name}] Completed.")
         return result
 
 
 class Crew:
-    def __init__(self, agents: List[Agent]):
+    """
+    Executa os agentes como um DAG: cada agente depende dos anteriores na lista
+    que produzem alguma de suas entradas, e agentes independentes rodam em paralelo
+    em um pool de threads. As atualizações de contexto são mescladas na ordem da
+    lista, então o resultado não depende da ordem de término.
+    """
+
+    def __init__(self, agents: List[Agent], max_workers: Optional[int] = None):
         self.agents = agents
+        self.max_workers = max_workers or max(1, len(agents))
+        self.timings: Dict[str, float] = {}
+
+    def dependencies(self) -> List[set]:
+        """Índices dos agentes dos quais cada agente depende."""
+        deps = []
+        for i, agent in enumerate(self.agents):
+            anteriores = self.agents[:i]
+            if not agent.declared:
+                deps.append(set(range(i)))
+                continue
+            d = set()
+            for j, prev in enumerate(anteriores):
+                if not prev.declared or agent.inputs & prev.outputs:
+                    d.add(j)
+            deps.append(d)
+        return deps
+
+    def _context_for(self, i: int, base: Dict, updates: Dict[int, Dict], closure: List[set]):
+        """Contexto visto pelo agente i: inicial + saídas de suas dependências, em ordem."""
+        ctx = dict(base)
+        for j in sorted(closure[i]):
+            ctx.update(updates.get(j) or {})
+        return ctx
 
     def execute(self, initial_context: Dict = None):
-        ctx = initial_context or {}
+        base = dict(initial_context or {})
+        deps = self.dependencies()
+
+        # Fecho transitivo: o agente enxerga as saídas de todos os seus ancestrais
+        closure = []
+        for d in deps:
+            c = set(d)
+            for j in d:
+                c |= closure[j]
+            closure.append(c)
+
+        updates: Dict[int, Dict] = {}
+        self.timings = {}
+        pendentes = set(range(len(self.agents)))
+        rodando = {}
+
+        def _run(i, ctx):
+            inicio = time.perf_counter()
+            try:
+                return self.agents[i].run(context=ctx)
+            finally:
+                self.timings[self.agents[i].name] = time.perf_counter() - inicio
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            try:
+                while pendentes or rodando:
+                    prontos = sorted(i for i in pendentes if deps[i] <= updates.keys())
+                    for i in prontos:
+                        pendentes.discard(i)
+                        ctx = self._context_for(i, base, updates, closure)
+                        # Copia o contexto de execução (tracing) para a thread do agente
+                        futuro = pool.submit(contextvars.copy_context().run, _run, i, ctx)
+                        rodando[futuro] = i
+
+                    feitos, _ = wait(rodando, return_when=FIRST_COMPLETED)
+                    for futuro in feitos:
+                        i = rodando.pop(futuro)
+                        out = futuro.result()
+                        updates[i] = out if isinstance(out, dict) else {}
+            except BaseException:
+                for futuro in rodando:
+                    futuro.cancel()
+                raise
 
-        for agent in self.agents:
-            out = agent.run(context=ctx)
-            if isinstance(out, dict):
-                ctx.update(out)
+        ctx = initial_context if initial_context is not None else {}
+        for i in range(len(self.agents)):
+            ctx.update(updates[i])
 
+        resumo = ", ".join(f"{nome}={t:.2f}s" for nome, t in self.timings.items())
+        logger.info(f"[Crew] Agent wall times: {resumo}")
         return ctx
@@ -0,0 +1,181 @@
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from src.tools import tracing
+
+# Instrumentação das etapas do pipeline (agentes, SQL, carga dos CSVs, chamadas ao
+# Groq, gráficos): cada medição vira um evento com duração e atributos, agregado por
+# etapa e exportado como resumo JSON e textfile do Prometheus (node_exporter).
+METRICAS_ATIVAS = os.getenv("SRAG_METRICS", "1") != "0"
+METRICAS_DIR = os.getenv("SRAG_METRICS_DIR", os.path.join("reports", "metrics"))
+MAX_EVENTOS = 10000  # eventos guardados para o resumo (os agregados contam todos)
+PREFIXO_PROMETHEUS = "srag"
+
+# Atributos numéricos somados nos agregados de cada etapa
+CONTADORES = ("linhas", "prompt_tokens", "completion_tokens")
+
+
+class Registro:
+    """Medições do processo: eventos recentes e agregados por etapa (thread-safe)."""
+
+    def __init__(self, max_eventos=MAX_EVENTOS):
+        self.max_eventos = max_eventos
+        self._lock = threading.Lock()
+        self.limpa()
+
+    def limpa(self):
+        with self._lock:
+            self.inicio = time.time()
+            self.eventos = []
+            self.etapas = {}
+
+    def registra(self, etapa: str, duracao_s: float, **atributos):
+        evento = {"etapa": etapa, "duracao_s": round(duracao_s, 6), **atributos}
+        with self._lock:
+            if len(self.eventos) < self.max_eventos:
+                self.eventos.append(evento)
+            agregado = self.etapas.setdefault(
+                etapa, {"n": 0, "total_s": 0.0, "min_s": None, "max_s": 0.0}
+            )
+            agregado["n"] += 1
+            agregado["total_s"] += duracao_s
+            agregado["max_s"] = max(agregado["max_s"], duracao_s)
+            if agregado["min_s"] is None or duracao_s < agregado["min_s"]:
+                agregado["min_s"] = duracao_s
+            for contador in CONTADORES:
+                if isinstance(atributos.get(contador), (int, float)):
+                    agregado[contador] = agregado.get(contador, 0) + atributos[contador]
+        return evento
+
+    def resumo(self) -> dict:
+        """Agregados por etapa (com linhas/s quando a etapa conta linhas) e eventos."""
+        with self._lock:
+            etapas = {}
+            for etapa, agregado in sorted(self.etapas.items()):
+                item = dict(agregado)
+                item["total_s"] = round(item["total_s"], 6)
+                item["min_s"] = round(item["min_s"], 6)
+                item["max_s"] = round(item["max_s"], 6)
+                item["media_s"] = round(agregado["total_s"] / agregado["n"], 6)
+                if "linhas" in item and agregado["total_s"] > 0:
+                    item["linhas_por_s"] = round(item["linhas"] / agregado["total_s"])
+                etapas[etapa] = item
+            return {
+                "inicio": datetime.fromtimestamp(self.inicio).isoformat(timespec="seconds"),
+                "duracao_s": round(time.time() - self.inicio, 3),
+                "etapas": etapas,
+                "eventos": list(self.eventos),
+            }
+
+
+registro = Registro()
+
+
+@contextmanager
+def cronometro(etapa: str, **atributos):
+    """
+    Mede o bloco e registra o evento da etapa. O dict devolvido aceita atributos
+    conhecidos só no fim (ex.: linhas retornadas, tokens). Com o Langfuse em uso,
+    a medição também é anexada ao span `@observe` corrente.
+    """
+    if not METRICAS_ATIVAS:
+        yield atributos
+        return
+    inicio = time.perf_counter()
+    try:
+        yield atributos
+    finally:
+        evento = registro.registra(etapa, time.perf_counter() - inicio, **atributos)
+        tracing.anexa_metadados({f"srag.{etapa}": evento})
+
+
+def cronometra_iteracao(iteravel, etapa: str, **atributos):
+    """Gera os itens de `iteravel` medindo a produção de cada um (ex.: leitura de lotes)."""
+    iterador = iter(iteravel)
+    while True:
+        inicio = time.perf_counter()
+        try:
+            item = next(iterador)
+        except StopIteration:
+            return
+        linhas = {"linhas": len(item)} if hasattr(item, "__len__") else {}
+        registra(etapa, time.perf_counter() - inicio, **atributos, **linhas)
+        yield item
+
+
+def registra(etapa: str, duracao_s: float, **atributos):
+    """Registra uma medição feita fora de `cronometro` (ex.: em outro processo)."""
+    if METRICAS_ATIVAS:
+        evento = registro.registra(etapa, duracao_s, **atributos)
+        tracing.anexa_metadados({f"srag.{etapa}": evento})
+
+
+def _rotulo(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def _nome_metrica(texto: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", texto)
+
+
+def formata_prometheus(resumo: dict) -> str:
+    """Formato de exposição do Prometheus (textfile collector do node_exporter)."""
+    p = PREFIXO_PROMETHEUS
+    linhas = [
+        f"# HELP {p}_etapa_duracao_segundos Duração das etapas do pipeline SRAG.",
+        f"# TYPE {p}_etapa_duracao_segundos summary",
+    ]
+    extras = []
+    for etapa, item in resumo["etapas"].items():
+        rotulo = f'etapa="{_rotulo(etapa)}"'
+        linhas.append(f"{p}_etapa_duracao_segundos_sum{{{rotulo}}} {item['total_s']}")
+        linhas.append(f"{p}_etapa_duracao_segundos_count{{{rotulo}}} {item['n']}")
+        extras.append(f"{p}_etapa_duracao_max_segundos{{{rotulo}}} {item['max_s']}")
+        for contador in CONTADORES:
+            if contador in item:
+                extras.append(f"{p}_{_nome_metrica(contador)}_total{{{rotulo}}} {item[contador]}")
+    linhas.extend(sorted(extras))
+    linhas.append(f"{p}_execucao_duracao_segundos {resumo['duracao_s']}")
+    linhas.append(f"{p}_execucao_timestamp_segundos {round(time.time())}")
+    return "\n".join(linhas) + "\n"
+
+
+def _grava_atomico(caminho: str, conteudo: str):
+    """Grava via arquivo temporário + rename (o coletor nunca lê arquivo pela metade)."""
+    os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        f.write(conteudo)
+    os.replace(temporario, caminho)
+
+
+def exporta(nome: str = "pipeline", diretorio: str = None) -> dict:
+    """
+    Grava o resumo da execução em `<dir>/<nome>_<timestamp>.json` e as métricas em
+    `<dir>/<nome>.prom` (sobrescrito a cada execução). Retorna os caminhos.
+    """
+    if not METRICAS_ATIVAS:
+        return {}
+    diretorio = diretorio or METRICAS_DIR
+    resumo = registro.resumo()
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    caminhos = {
+        "json": os.path.join(diretorio, f"{nome}_{timestamp}.json"),
+        "prometheus": os.path.join(diretorio, f"{nome}.prom"),
+    }
+    _grava_atomico(caminhos["json"], json.dumps(resumo, indent=2, ensure_ascii=False, default=str))
+    _grava_atomico(caminhos["prometheus"], formata_prometheus(resumo))
+    return caminhos
+
+
+def imprime_resumo(resumo: dict = None):
+    """Tabela curta com o tempo total de cada etapa."""
+    resumo = resumo or registro.resumo()
+    for etapa, item in resumo["etapas"].items():
+        vazao = f" | {item['linhas_por_s']:,} linhas/s" if "linhas_por_s" in item else ""
+        print(f"  {etapa:<24} {item['n']:>5}x {item['total_s']:>9.3f}s{vazao}")
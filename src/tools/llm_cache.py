@@ -0,0 +1,172 @@
+import hashlib
+import importlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+from src.tools.instrumentation import cronometro
+
+# Cache das respostas de chat completion (Groq), endereçado pelo conteúdo da
+# requisição: modelo + mensagens + temperatura (e demais parâmetros).
+CACHE_ATIVO = os.getenv("SRAG_LLM_CACHE", "1") != "0"
+CACHE_DIR = os.getenv("SRAG_LLM_CACHE_DIR", os.path.join(".cache", "llm"))
+
+# TTL (segundos) por ponto de chamada: notícias envelhecem rápido; a análise de
+# métricas só muda quando os dados mudam, e aí o prompt (e a chave) também muda.
+TTL_PADRAO = 3600
+TTLS = {
+    "news": int(os.getenv("SRAG_LLM_TTL_NEWS", str(3 * 3600))),
+    "metrics_analysis": int(os.getenv("SRAG_LLM_TTL_METRICS", str(7 * 24 * 3600))),
+}
+
+_memoria = {}  # chave -> (criado_em, resposta)
+_em_andamento = {}  # chave -> Future da requisição em curso
+_lock = threading.Lock()
+contadores = {"hits": 0, "misses": 0, "deduplicadas": 0}
+
+
+def chave_requisicao(**params) -> str:
+    """Hash SHA-256 dos parâmetros da requisição (modelo, mensagens, temperatura...)."""
+    bruto = json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(bruto.encode("utf-8")).hexdigest()
+
+
+def _serializa(resposta) -> dict:
+    """Converte a resposta do SDK (modelo pydantic) em JSON com a classe de origem."""
+    classe = type(resposta)
+    dados = resposta.model_dump() if hasattr(resposta, "model_dump") else resposta
+    return {"classe": f"{classe.__module__}:{classe.__qualname__}", "dados": dados}
+
+
+def _para_namespace(valor):
+    """Acesso por atributo quando a classe original não pode ser importada."""
+    if isinstance(valor, dict):
+        return SimpleNamespace(**{k: _para_namespace(v) for k, v in valor.items()})
+    if isinstance(valor, list):
+        return [_para_namespace(v) for v in valor]
+    return valor
+
+
+def _desserializa(registro: dict):
+    """Reconstrói a resposta no tipo original do SDK (ou em SimpleNamespace)."""
+    modulo, _, nome = registro["classe"].partition(":")
+    try:
+        classe = importlib.import_module(modulo)
+        for parte in nome.split("."):
+            classe = getattr(classe, parte)
+        return classe.model_validate(registro["dados"])
+    except (ImportError, AttributeError):
+        return _para_namespace(registro["dados"])
+
+
+def _caminho(chave: str) -> str:
+    return os.path.join(CACHE_DIR, chave[:2], f"{chave}.json")
+
+
+def _le_disco(chave: str, ttl: int):
+    """
+    Lê do disco a resposta ainda válida (None se ausente, expirada, ilegível ou que
+    não se reconstrói mais; nesse caso o arquivo é removido).
+    """
+    try:
+        with open(_caminho(chave), encoding="utf-8") as f:
+            registro = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Cache LLM ilegível ({chave}): {e}")
+        return None
+    try:
+        if time.time() - registro["criado_em"] > ttl:
+            return None
+        return registro["criado_em"], _desserializa(registro)
+    except Exception as e:
+        # Ex.: resposta gravada por outra versão do SDK que não valida mais: vira miss
+        print(f"⚠️ Cache LLM inválido ({chave}), descartado: {e}")
+        try:
+            os.remove(_caminho(chave))
+        except OSError:
+            pass
+        return None
+
+
+def _grava_disco(chave: str, criado_em: float, resposta, params: dict):
+    """Grava a resposta em disco de forma atômica."""
+    caminho = _caminho(chave)
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    registro = {"criado_em": criado_em, "modelo": params.get("model"), **_serializa(resposta)}
+    temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(registro, f, ensure_ascii=False, default=str)
+        os.replace(temporario, caminho)
+    except (OSError, TypeError, ValueError) as e:
+        print(f"⚠️ Resposta não gravada no cache LLM: {e}")
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+
+def _cria(client, call_site: str, params: dict):
+    """Chamada real ao LLM, medida com latência e tokens (response.usage)."""
+    with cronometro("llm", call_site=call_site, modelo=params.get("model")) as medicao:
+        resposta = client.chat.completions.create(**params)
+        uso = getattr(resposta, "usage", None)
+        for campo in ("prompt_tokens", "completion_tokens"):
+            if isinstance(getattr(uso, campo, None), int):
+                medicao[campo] = getattr(uso, campo)
+    return resposta
+
+
+def chat_completion(client, call_site: str, ttl: int = None, **params):
+    """
+    Equivalente a client.chat.completions.create(**params) com cache.
+    `call_site` escolhe o TTL (TTLS); chamadas idênticas simultâneas esperam a
+    primeira em vez de repetir a requisição.
+    """
+    if params.get("stream"):
+        return client.chat.completions.create(**params)
+    if not CACHE_ATIVO:
+        return _cria(client, call_site, params)
+
+    ttl = TTLS.get(call_site, TTL_PADRAO) if ttl is None else ttl
+    chave = chave_requisicao(**params)
+
+    with _lock:
+        item = _memoria.get(chave)
+        if item is not None and time.time() - item[0] <= ttl:
+            contadores["hits"] += 1
+            return item[1]
+        futuro = _em_andamento.get(chave)
+        dono = futuro is None
+        if dono:
+            futuro = _em_andamento[chave] = Future()
+        else:
+            contadores["deduplicadas"] += 1
+
+    if not dono:
+        return futuro.result()
+
+    try:
+        item = _le_disco(chave, ttl)
+        if item is not None:
+            with _lock:
+                contadores["hits"] += 1
+        else:
+            with _lock:
+                contadores["misses"] += 1
+            resposta = _cria(client, call_site, params)
+            item = (time.time(), resposta)
+            _grava_disco(chave, item[0], resposta, params)
+        with _lock:
+            _memoria[chave] = item
+        futuro.set_result(item[1])
+        return item[1]
+    except BaseException as e:
+        futuro.set_exception(e)
+        raise
+    finally:
+        with _lock:
+            _em_andamento.pop(chave, None)
@@ -0,0 +1,62 @@
+import os
+import threading
+import time
+
+from src.tools.instrumentation import cronometro
+
+# Cliente Groq compartilhado, criado no primeiro uso: importar os agentes não
+# carrega o SDK nem exige GROQ_API_KEY
+_client = None
+_lock = threading.Lock()
+
+
+def get_groq_client():
+    """Retorna o cliente Groq do processo, criando-o na primeira chamada."""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                from groq import Groq
+
+                _client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+    return _client
+
+
+def stream_chat(client, on_progress=None, etapa="llm", **params):
+    """
+    Executa um chat completion com stream=True e gera os trechos de texto à
+    medida que chegam. `on_progress(evento)` recebe o tempo até o primeiro token
+    ("primeiro_token", ttft_s) e o fim da geração ("concluido", duracao_s, trechos).
+    """
+    inicio = time.perf_counter()
+    trechos = 0
+    with cronometro("llm", call_site=etapa, modelo=params.get("model"), stream=True) as medicao:
+        for chunk in client.chat.completions.create(stream=True, **params):
+            # O Groq envia o uso de tokens no último chunk (x_groq.usage)
+            uso = getattr(getattr(chunk, "x_groq", None), "usage", None)
+            for campo in ("prompt_tokens", "completion_tokens"):
+                if isinstance(getattr(uso, campo, None), int):
+                    medicao[campo] = getattr(uso, campo)
+            if not chunk.choices:
+                continue
+            texto = chunk.choices[0].delta.content
+            if not texto:
+                continue
+            if trechos == 0:
+                medicao["ttft_s"] = round(time.perf_counter() - inicio, 6)
+                if on_progress:
+                    on_progress(
+                        {"etapa": etapa, "evento": "primeiro_token", "ttft_s": medicao["ttft_s"]}
+                    )
+            trechos += 1
+            yield texto
+        medicao["trechos"] = trechos
+    if on_progress:
+        on_progress(
+            {
+                "etapa": etapa,
+                "evento": "concluido",
+                "duracao_s": time.perf_counter() - inicio,
+                "trechos": trechos,
+            }
+        )
@@ -0,0 +1,73 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from src.tools.instrumentation import registra
+
+# Processos de renderização dos gráficos (matplotlib não é thread-safe); com uma só
+# CPU, um segundo processo só disputa o processador com o primeiro
+PLOT_WORKERS = int(os.getenv("SRAG_PLOT_WORKERS") or min(2, os.cpu_count() or 1))
+
+
+def plot_series(series_records, x_key, y_key, outpath, title):
+    """Gera e salva um gráfico de linha a partir de uma série temporal."""
+    # Importados aqui: só os processos que desenham pagam o custo de importação
+    import pandas as pd
+    import seaborn as sns
+    from matplotlib.figure import Figure
+
+    df = pd.DataFrame(series_records)
+    df[x_key] = pd.to_datetime(df[x_key])
+
+    # Configurações do gráfico (API orientada a objetos: sem estado global do pyplot)
+    sns.set_theme(style="whitegrid")
+    fig = Figure(figsize=(10, 4))
+    ax = fig.add_subplot()
+    sns.lineplot(data=df, x=x_key, y=y_key, marker="o", ax=ax)
+    ax.set_title(title)
+    ax.set_xlabel("")
+    fig.tight_layout()
+    fig.savefig(outpath)
+
+    return outpath
+
+
+def plot_pool(workers: int = None) -> ProcessPoolExecutor:
+    """
+    Pool de processos para renderizar gráficos. Usa 'spawn' porque o chamador
+    normalmente já tem threads ativas (Crew, clientes HTTP), e fork com threads
+    pode travar o processo filho.
+    """
+    return ProcessPoolExecutor(
+        max_workers=max(1, workers or PLOT_WORKERS),
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+def _plot_medido(*args):
+    """plot_series no processo filho, devolvendo também a duração da renderização."""
+    inicio = time.perf_counter()
+    caminho = plot_series(*args)
+    return caminho, time.perf_counter() - inicio
+
+
+def submete_plot(pool, series_records, x_key, y_key, outpath, title) -> Future:
+    """
+    Submete plot_series ao pool e devolve um Future com o caminho do gráfico.
+    A duração medida no processo filho é registrada na instrumentação deste processo.
+    """
+    interno = pool.submit(_plot_medido, series_records, x_key, y_key, outpath, title)
+    saida = Future()
+
+    def conclui(futuro):
+        try:
+            caminho, duracao = futuro.result()
+        except BaseException as e:
+            saida.set_exception(e)
+            return
+        registra("plot", duracao, arquivo=os.path.basename(outpath), pontos=len(series_records))
+        saida.set_result(caminho)
+
+    interno.add_done_callback(conclui)
+    return saida
@@ -0,0 +1,174 @@
+import math
+import os
+from datetime import date, datetime
+from numbers import Integral, Number
+
+# Codificação compacta dos dados enviados ao LLM: métricas em uma linha chave=valor
+# e séries em formato colunar (cabeçalho + linhas CSV), com números arredondados.
+# O tamanho do prompt pesa na latência e no custo das chamadas ao Groq.
+PAYLOAD_MAX_TOKENS = int(os.getenv("SRAG_PROMPT_MAX_TOKENS", "1500"))
+CARACTERES_POR_TOKEN = 3.5  # estimativa conservadora para texto em português e números
+CASAS_DECIMAIS = 2
+MANTER_RECENTES = 12  # linhas finais de cada série que nunca são agregadas
+
+
+def estima_tokens(texto: str) -> int:
+    """Estimativa de tokens a partir do número de caracteres."""
+    return math.ceil(len(texto) / CARACTERES_POR_TOKEN)
+
+
+def _e_nulo(valor) -> bool:
+    return valor is None or (isinstance(valor, float) and math.isnan(valor))
+
+
+def _formata_numero(valor) -> str:
+    """Inteiros sem casas; demais números com até CASAS_DECIMAIS casas."""
+    if isinstance(valor, bool):
+        return str(valor)
+    if isinstance(valor, Integral):
+        return str(int(valor))
+    valor = float(valor)
+    if valor.is_integer():
+        return str(int(valor))
+    return f"{valor:.{CASAS_DECIMAIS}f}".rstrip("0").rstrip(".")
+
+
+def _formatador(valores):
+    """Escolhe o formato de uma coluna: mês (AAAA-MM), data, número ou texto."""
+    presentes = [v for v in valores if not _e_nulo(v)]
+    if presentes and all(isinstance(v, (datetime, date)) for v in presentes):
+        mensal = all(
+            v.day == 1 and (not isinstance(v, datetime) or v.time() == datetime.min.time())
+            for v in presentes
+        )
+        return (lambda v: v.strftime("%Y-%m")) if mensal else (lambda v: v.strftime("%Y-%m-%d"))
+    if presentes and all(isinstance(v, Number) for v in presentes):
+        return _formata_numero
+
+    def texto(v):
+        v = str(v)
+        return f'"{v}"' if ("," in v or "\n" in v) else v
+
+    return texto
+
+
+class _Serie:
+    """Série tabular: colunas, linhas brutas e linhas já agregadas (rótulo, valores)."""
+
+    def __init__(self, nome, registros):
+        self.nome = nome
+        self.colunas = list(registros[0].keys()) if registros else []
+        self.linhas = [[r.get(c) for c in self.colunas] for r in registros]
+        self.pesos = [1] * len(self.linhas)  # linhas originais representadas por linha
+        self.omitidas = 0
+        self.formatos = [
+            _formatador([linha[i] for linha in self.linhas]) for i in range(len(self.colunas))
+        ]
+
+    def _celula(self, i, valor):
+        if _e_nulo(valor):
+            return ""
+        if isinstance(valor, tuple):  # intervalo de rótulos após agregação
+            return f"{self._celula(i, valor[0])}..{self._celula(i, valor[1])}"
+        return self.formatos[i](valor)
+
+    def agregavel(self) -> bool:
+        """Só séries cujas colunas, exceto a primeira, são numéricas podem ser somadas."""
+        return len(self.colunas) > 1 and all(f is _formata_numero for f in self.formatos[1:])
+
+    def reduz(self) -> bool:
+        """
+        Reduz a parte antiga da série (antes das MANTER_RECENTES últimas linhas):
+        soma pares de linhas consecutivas quando possível; senão, omite as mais antigas.
+        Retorna False se nada mais pode ser reduzido.
+        """
+        antigas = len(self.linhas) - MANTER_RECENTES
+        if antigas <= 0:
+            return False
+        if not self.agregavel() or antigas == 1:
+            self.omitidas += sum(self.pesos[:antigas])
+            self.linhas = self.linhas[antigas:]
+            self.pesos = self.pesos[antigas:]
+            return True
+
+        agregadas, pesos = [], []
+        for k in range(0, antigas, 2):
+            grupo = self.linhas[k : min(k + 2, antigas)]
+            pesos.append(sum(self.pesos[k : min(k + 2, antigas)]))
+            inicio = grupo[0][0][0] if isinstance(grupo[0][0], tuple) else grupo[0][0]
+            fim = grupo[-1][0][1] if isinstance(grupo[-1][0], tuple) else grupo[-1][0]
+            rotulo = (inicio, fim) if len(grupo) > 1 or isinstance(grupo[0][0], tuple) else inicio
+            somas = [
+                sum(linha[i] for linha in grupo if not _e_nulo(linha[i]))
+                for i in range(1, len(self.colunas))
+            ]
+            agregadas.append([rotulo, *somas])
+        self.linhas = agregadas + self.linhas[antigas:]
+        self.pesos = pesos + self.pesos[antigas:]
+        return True
+
+    def codifica(self) -> str:
+        if not self.colunas:
+            return f"{self.nome}: (sem dados)"
+        cabecalho = f"{self.nome} ({len(self.linhas)} linhas"
+        if self.omitidas:
+            cabecalho += f"; {self.omitidas} linha(s) mais antiga(s) omitida(s)"
+        if any(isinstance(linha[0], tuple) for linha in self.linhas):
+            cabecalho += "; linhas a..b somam o intervalo"
+        partes = [cabecalho + ")", ",".join(self.colunas)]
+        partes.extend(
+            ",".join(self._celula(i, v) for i, v in enumerate(linha)) for linha in self.linhas
+        )
+        return "\n".join(partes)
+
+
+def _achata(dados: dict, prefixo: str = ""):
+    """Pares chave=valor de um dict aninhado (chaves compostas com '.')."""
+    for chave, valor in dados.items():
+        nome = f"{prefixo}{chave}"
+        if isinstance(valor, dict):
+            yield from _achata(valor, f"{nome}.")
+        else:
+            yield nome, valor
+
+
+def _codifica_escalares(nome: str, dados: dict) -> str:
+    pares = []
+    for chave, valor in _achata(dados):
+        if _e_nulo(valor):
+            texto = "n/d"
+        elif isinstance(valor, Number):
+            texto = _formata_numero(valor)
+        else:
+            texto = str(valor)
+        pares.append(f"{chave}={texto}")
+    return f"{nome}: " + "; ".join(pares)
+
+
+def codifica_payload(dados: dict, max_tokens: int = PAYLOAD_MAX_TOKENS) -> str:
+    """
+    Codifica o contexto para o prompt: dicts viram `chave=valor`, listas de
+    registros viram CSV. Acima de `max_tokens`, a série mais longa tem sua parte
+    antiga agregada (ou omitida) até caber; as linhas recentes ficam intactas.
+    """
+    blocos = []
+    for nome, valor in dados.items():
+        if isinstance(valor, dict):
+            blocos.append(_codifica_escalares(nome, valor))
+        elif isinstance(valor, list) and all(isinstance(r, dict) for r in valor):
+            blocos.append(_Serie(nome, valor))
+        else:
+            blocos.append(f"{nome}: {valor}")
+
+    def texto():
+        return "\n\n".join(b.codifica() if isinstance(b, _Serie) else b for b in blocos)
+
+    series = [b for b in blocos if isinstance(b, _Serie)]
+    atual = texto()
+    while estima_tokens(atual) > max_tokens:
+        # Reduz primeiro a série mais longa; para quando só restam linhas recentes
+        candidatas = sorted(series, key=lambda s: len(s.linhas), reverse=True)
+        if not any(s.reduz() for s in candidatas):
+            break
+        atual = texto()
+    return atual
@@ -0,0 +1,210 @@
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# Cache de resultados de consultas: memória (LRU) e, opcionalmente, disco (Parquet).
+# A chave combina o SQL normalizado com a impressão digital dos dados consultados,
+# então qualquer escrita no DB (ou nova exportação Parquet) invalida as entradas.
+CACHE_ATIVO = os.getenv("SRAG_QUERY_CACHE", "1") != "0"
+CACHE_MB = float(os.getenv("SRAG_QUERY_CACHE_MB", "256"))
+CACHE_DIR = os.getenv("SRAG_QUERY_CACHE_DIR")  # vazio = sem camada em disco
+CACHE_DISCO_MB = float(os.getenv("SRAG_QUERY_CACHE_DISK_MB", "1024"))
+
+# Literais entre aspas são preservados; fora deles os espaços são normalizados
+_TOKENS_SQL = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")|\s+")
+
+
+def normaliza_sql(sql: str) -> str:
+    """Colapsa espaços fora de literais e remove espaços e ';' nas pontas."""
+
+    def troca(m):
+        return m.group(1) if m.group(1) else " "
+
+    return _TOKENS_SQL.sub(troca, sql).strip().rstrip(";").strip()
+
+
+def _assinatura_arquivos(caminhos) -> tuple:
+    """Tamanho e mtime dos arquivos existentes (mudam a cada escrita)."""
+    assinatura = []
+    for caminho in caminhos:
+        try:
+            st = os.stat(caminho)
+        except FileNotFoundError:
+            continue
+        assinatura.append((os.path.basename(caminho), st.st_size, st.st_mtime_ns))
+    return tuple(assinatura)
+
+
+def fingerprint_sqlite(db_path: str) -> tuple:
+    """Versão do DB SQLite: arquivo principal e WAL, se houver."""
+    db_path = os.path.abspath(db_path)
+    return _assinatura_arquivos([db_path, db_path + "-wal"])
+
+
+def fingerprint_parquet(parquet_dir: str) -> tuple:
+    """Versão de um diretório Parquet: todos os arquivos .parquet abaixo dele."""
+    caminhos = []
+    for raiz, _, arquivos in os.walk(parquet_dir):
+        caminhos.extend(os.path.join(raiz, a) for a in arquivos if a.endswith(".parquet"))
+    return _assinatura_arquivos(sorted(caminhos))
+
+
+def _tamanho_df(df: pd.DataFrame) -> int:
+    """Memória ocupada pelo DataFrame, em bytes."""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+class CacheConsultas:
+    """
+    Cache de DataFrames em dois níveis: LRU em memória limitado em bytes e
+    camada opcional em disco (um Parquet por chave, removidos do mais antigo).
+    Os DataFrames são copiados na entrada e na saída para que quem chama possa
+    alterá-los sem corromper o cache.
+    """
+
+    def __init__(self, max_mb=CACHE_MB, diretorio=CACHE_DIR, max_disco_mb=CACHE_DISCO_MB):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.diretorio = diretorio
+        self.max_disco_bytes = int(max_disco_mb * 1024 * 1024)
+        self._memoria = OrderedDict()  # chave -> (DataFrame, bytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.contadores = dict.fromkeys(
+            ("hits_memoria", "hits_disco", "misses", "evictions_memoria", "evictions_disco"), 0
+        )
+
+    @staticmethod
+    def chave(backend: str, origem: str, fingerprint: tuple, sql: str, params=()) -> str:
+        """Chave do cache: backend, origem dos dados, versão, SQL normalizado e parâmetros."""
+        bruto = repr((backend, origem, fingerprint, normaliza_sql(sql), tuple(params or ())))
+        return hashlib.sha256(bruto.encode("utf-8")).hexdigest()
+
+    def _conta(self, contador):
+        with self._lock:
+            self.contadores[contador] += 1
+
+    def _guarda_memoria(self, chave, df):
+        """Insere no LRU e descarta as entradas menos usadas acima do limite."""
+        tamanho = _tamanho_df(df)
+        if tamanho > self.max_bytes:
+            return
+        with self._lock:
+            antigo = self._memoria.pop(chave, None)
+            if antigo is not None:
+                self._bytes -= antigo[1]
+            self._memoria[chave] = (df, tamanho)
+            self._bytes += tamanho
+            while self._bytes > self.max_bytes:
+                _, (_, liberado) = self._memoria.popitem(last=False)
+                self._bytes -= liberado
+                self.contadores["evictions_memoria"] += 1
+
+    def _caminho_disco(self, chave):
+        return os.path.join(self.diretorio, f"{chave}.parquet")
+
+    def _le_disco(self, chave):
+        """Lê a entrada do disco (None se ausente ou ilegível)."""
+        if not self.diretorio:
+            return None
+        caminho = self._caminho_disco(chave)
+        try:
+            df = pd.read_parquet(caminho)
+        except (FileNotFoundError, ImportError):
+            return None
+        except Exception as e:
+            print(f"⚠️ Cache de consultas ilegível ({caminho}): {e}")
+            return None
+        os.utime(caminho)  # marca como usado recentemente
+        return df
+
+    def _grava_disco(self, chave, df):
+        """Grava a entrada em disco (escrita atômica) e aplica o limite de tamanho."""
+        if not self.diretorio:
+            return
+        os.makedirs(self.diretorio, exist_ok=True)
+        caminho = self._caminho_disco(chave)
+        temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            df.to_parquet(temporario, index=False)
+            os.replace(temporario, caminho)
+        except Exception as e:
+            # Tipos sem representação em Parquet ou pyarrow ausente: fica só na memória
+            print(f"⚠️ Resultado não gravado no cache em disco: {e}")
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            return
+        self._limita_disco()
+
+    def _limita_disco(self):
+        """Remove os arquivos usados há mais tempo até caber em max_disco_bytes."""
+        entradas = []
+        for nome in os.listdir(self.diretorio):
+            if not nome.endswith(".parquet"):
+                continue
+            caminho = os.path.join(self.diretorio, nome)
+            try:
+                st = os.stat(caminho)
+            except FileNotFoundError:
+                continue
+            entradas.append((st.st_mtime_ns, st.st_size, caminho))
+        total = sum(e[1] for e in entradas)
+        for _, tamanho, caminho in sorted(entradas):
+            if total <= self.max_disco_bytes:
+                break
+            try:
+                os.remove(caminho)
+            except FileNotFoundError:
+                pass
+            total -= tamanho
+            self._conta("evictions_disco")
+
+    def busca(self, chave):
+        """Retorna uma cópia do resultado em cache ou None."""
+        with self._lock:
+            item = self._memoria.get(chave)
+            if item is not None:
+                self._memoria.move_to_end(chave)
+                self.contadores["hits_memoria"] += 1
+                return item[0].copy()
+
+        df = self._le_disco(chave)
+        if df is not None:
+            self._conta("hits_disco")
+            self._guarda_memoria(chave, df)
+            return df.copy()
+
+        self._conta("misses")
+        return None
+
+    def guarda(self, chave, df: pd.DataFrame):
+        """Armazena uma cópia do resultado nos dois níveis."""
+        df = df.copy()
+        self._guarda_memoria(chave, df)
+        self._grava_disco(chave, df)
+
+    def obtem(self, chave, calcula):
+        """Retorna o resultado em cache ou executa `calcula()` e armazena."""
+        df = self.busca(chave)
+        if df is None:
+            df = calcula()
+            self.guarda(chave, df)
+        return df
+
+    def limpa(self, disco=False):
+        """Esvazia a memória (e o diretório em disco, se disco=True)."""
+        with self._lock:
+            self._memoria.clear()
+            self._bytes = 0
+        if disco and self.diretorio and os.path.isdir(self.diretorio):
+            for nome in os.listdir(self.diretorio):
+                if nome.endswith(".parquet"):
+                    os.remove(os.path.join(self.diretorio, nome))
+
+    def estatisticas(self) -> dict:
+        """Contadores de hits/misses e ocupação atual da memória."""
+        with self._lock:
+            return {**self.contadores, "entradas": len(self._memoria), "bytes": self._bytes}
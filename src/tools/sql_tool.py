@@ -1,13 +1,230 @@
+import os
+import queue
 import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
 import pandas as pd
 
+from src.tools.instrumentation import cronometro
+from src.tools.query_cache import (
+    CACHE_ATIVO,
+    CacheConsultas,
+    fingerprint_parquet,
+    fingerprint_sqlite,
+    normaliza_sql,
+)
 
-def query_sqlite(db_path: str, sql: str) -> pd.DataFrame:
-    """Executa SQL e retorna DataFrame."""
-    con = sqlite3.connect(db_path)
+# Backends disponíveis: "sqlite" lê srag.db; "duckdb" lê os Parquet exportados
+# por src/utils/parquet_export.py. Escolhido via SRAG_QUERY_BACKEND.
+BACKENDS = ("sqlite", "duckdb")
+
+# Conexões DuckDB em memória, uma por diretório Parquet (views já registradas)
+_duckdb_cons = {}
+_duckdb_lock = threading.Lock()
+
+# Pool de conexões SQLite somente leitura, um por arquivo de DB
+POOL_SIZE = int(os.getenv("SRAG_POOL_SIZE", "4"))
+PRAGMAS_LEITURA = (
+    "PRAGMA mmap_size = 268435456",  # 256 MB mapeados em memória
+    "PRAGMA cache_size = -65536",  # 64 MB de cache de páginas por conexão
+    # temp_store fica no padrão: com MEMORY as B-trees temporárias de GROUP BY ficaram
+    # mais lentas nas consultas das rollups
+    "PRAGMA query_only = ON",
+)
+_pools = {}
+_pools_lock = threading.Lock()
+
+# Caracteres do SQL guardados em cada medição (instrumentação)
+SQL_MAX_CARACTERES = 200
+
+# Cache de resultados compartilhado pelo processo (ver src/tools/query_cache.py)
+cache_consultas = CacheConsultas()
+
+
+def get_backend(backend: str = None) -> str:
+    """Resolve o backend de consulta a partir do argumento ou da configuração."""
+    backend = (backend or os.getenv("SRAG_QUERY_BACKEND") or "sqlite").lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de consulta inválido: {backend!r} (use {BACKENDS})")
+    return backend
+
+
+def parquet_dir_for(db_path: str) -> str:
+    """Diretório Parquet associado ao DB (SRAG_PARQUET_DIR ou ./parquet ao lado do DB)."""
+    return os.getenv("SRAG_PARQUET_DIR") or os.path.join(
+        os.path.dirname(os.path.abspath(db_path)), "parquet"
+    )
+
+
+def _duckdb_connection(parquet_dir: str):
+    """Retorna (criando se preciso) a conexão DuckDB com uma view por tabela exportada."""
+    import duckdb  # importado sob demanda: só é necessário no backend duckdb
+
+    with _duckdb_lock:
+        con = _duckdb_cons.get(parquet_dir)
+        if con is None:
+            if not os.path.isdir(parquet_dir):
+                raise FileNotFoundError(f"Diretório Parquet não encontrado: {parquet_dir}")
+            con = duckdb.connect()
+            for tabela in sorted(os.listdir(parquet_dir)):
+                caminho = os.path.join(parquet_dir, tabela)
+                if not os.path.isdir(caminho) or "." in tabela:
+                    continue
+                padrao = os.path.join(caminho, "**", "*.parquet").replace("'", "''")
+                con.execute(
+                    f"CREATE VIEW {tabela} AS "
+                    f"SELECT * FROM read_parquet('{padrao}', hive_partitioning = false)"
+                )
+            _duckdb_cons[parquet_dir] = con
+        return con
+
+
+def _query_duckdb(parquet_dir: str, sql: str, params=None) -> pd.DataFrame:
+    """Executa SQL no DuckDB sobre os arquivos Parquet e retorna DataFrame."""
+    cur = _duckdb_connection(parquet_dir).cursor()
     try:
-        df = pd.read_sql_query(sql, con)
-        return df
+        rel = cur.sql(sql, params=list(params) if params else None)
+        # SUM de inteiros vira HUGEINT no DuckDB (float64 no pandas); volta para BIGINT
+        # para que os dois backends retornem os mesmos tipos.
+        projecao = [
+            f'CAST("{c}" AS BIGINT) AS "{c}"' if str(t) == "HUGEINT" else f'"{c}"'
+            for c, t in zip(rel.columns, rel.types, strict=True)
+        ]
+        return rel.project(", ".join(projecao)).df()
     finally:
-        con.close()
+        cur.close()
+
+
+class PoolLeitura:
+    """
+    Pool de conexões SQLite somente leitura (URI mode=ro) para um arquivo de DB.
+    Conexões ociosas mantêm o cache de páginas entre consultas; cada conexão é
+    usada por uma thread por vez, então consultas paralelas usam conexões distintas.
+    """
+
+    def __init__(self, db_path: str, tamanho: int = POOL_SIZE):
+        self.db_path = os.path.abspath(db_path)
+        self.tamanho = max(1, tamanho)
+        self._livres = queue.LifoQueue()
+        self._vagas = threading.BoundedSemaphore(self.tamanho)
+
+    def _abre(self) -> sqlite3.Connection:
+        """Abre uma conexão somente leitura com os PRAGMAs de leitura."""
+        if not os.path.exists(self.db_path):
+            raise FileNotFoundError(f"Banco de dados não encontrado: {self.db_path}")
+        uri = f"file:{self.db_path}?mode=ro"
+        con = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        for pragma in PRAGMAS_LEITURA:
+            con.execute(pragma)
+        return con
+
+    @contextmanager
+    def conexao(self):
+        """Empresta uma conexão do pool (bloqueia se todas estiverem em uso)."""
+        with self._vagas:
+            try:
+                con = self._livres.get_nowait()
+            except queue.Empty:
+                con = self._abre()
+            try:
+                yield con
+            finally:
+                self._livres.put(con)
+
+    def fecha(self):
+        """Fecha as conexões ociosas do pool."""
+        while True:
+            try:
+                self._livres.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def get_pool(db_path: str) -> PoolLeitura:
+    """Retorna (criando se preciso) o pool de leitura do DB."""
+    chave = os.path.abspath(db_path)
+    with _pools_lock:
+        pool = _pools.get(chave)
+        if pool is None:
+            pool = _pools[chave] = PoolLeitura(chave)
+        return pool
+
+
+def fecha_pools():
+    """Fecha todas as conexões de leitura em cache (ex.: antes de recriar o DB)."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.fecha()
+
+
+def _executa(db_path: str, sql: str, backend: str, params: tuple = ()) -> pd.DataFrame:
+    """Executa SQL no backend resolvido, sem cache."""
+    if backend == "duckdb":
+        return _query_duckdb(parquet_dir_for(db_path), sql, params)
+
+    with get_pool(db_path).conexao() as con:
+        return pd.read_sql_query(sql, con, params=params or None)
+
+
+def query_sqlite(
+    db_path: str,
+    sql: str,
+    backend: str = None,
+    cache: bool = CACHE_ATIVO,
+    params=None,
+) -> pd.DataFrame:
+    """
+    Executa SQL e retorna DataFrame (SQLite ou DuckDB/Parquet, conforme configuração).
+    `params` preenche os placeholders `?` do SQL (ex.: limites de uma janela de datas).
+    """
+    backend = get_backend(backend)
+    params = tuple(params or ())
+    texto = normaliza_sql(sql)[:SQL_MAX_CARACTERES]
+    with cronometro("sql", sql=texto, params=list(params), backend=backend) as medicao:
+        df = _consulta(db_path, sql, backend, cache, params)
+        medicao["linhas"] = len(df)
+    return df
+
+
+def _consulta(db_path: str, sql: str, backend: str, cache: bool, params: tuple) -> pd.DataFrame:
+    """Consulta pelo cache de resultados (ou direto no backend, com cache=False)."""
+    if not cache:
+        return _executa(db_path, sql, backend, params)
+
+    # A versão dos dados entra na chave: qualquer escrita invalida o resultado
+    if backend == "duckdb":
+        origem = os.path.abspath(parquet_dir_for(db_path))
+        versao = fingerprint_parquet(origem)
+    else:
+        origem = os.path.abspath(db_path)
+        versao = fingerprint_sqlite(origem)
+    chave = cache_consultas.chave(backend, origem, versao, sql, params)
+    return cache_consultas.obtem(chave, lambda: _executa(db_path, sql, backend, params))
+
+
+def query_many(
+    db_path: str, consultas: dict, backend: str = None, cache: bool = CACHE_ATIVO
+) -> dict:
+    """
+    Executa consultas independentes em paralelo, cada uma em sua própria conexão.
+    Recebe {nome: sql} ou {nome: (sql, params)} e retorna {nome: DataFrame}.
+    """
+    consultas = {
+        nome: consulta if isinstance(consulta, tuple) else (consulta, None)
+        for nome, consulta in consultas.items()
+    }
+    if len(consultas) <= 1:
+        return {
+            nome: query_sqlite(db_path, sql, backend, cache, params)
+            for nome, (sql, params) in consultas.items()
+        }
+    with ThreadPoolExecutor(max_workers=min(len(consultas), POOL_SIZE)) as pool:
+        futuros = {
+            nome: pool.submit(query_sqlite, db_path, sql, backend, cache, params)
+            for nome, (sql, params) in consultas.items()
+        }
+        return {nome: futuro.result() for nome, futuro in futuros.items()}
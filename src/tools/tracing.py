@@ -0,0 +1,84 @@
+import functools
+import sys
+import threading
+
+# Integração com o Langfuse carregada sob demanda: o SDK (e o cliente) só são
+# importados quando uma função observada roda pela primeira vez.
+_observe = None
+_lock = threading.Lock()
+
+
+def _langfuse_observe():
+    """Decorator `observe` do Langfuse, ou None se o pacote não estiver instalado."""
+    global _observe
+    if _observe is None:
+        with _lock:
+            if _observe is None:
+                try:
+                    from langfuse import observe as langfuse_observe
+                except ImportError:
+                    langfuse_observe = False
+                _observe = langfuse_observe
+    return _observe or None
+
+
+def observe(**kwargs):
+    """Equivalente a `langfuse.observe(**kwargs)`, aplicado no primeiro uso da função."""
+
+    def decorator(func):
+        observada = None
+
+        @functools.wraps(func)
+        def wrapper(*args, **kw):
+            nonlocal observada
+            if observada is None:
+                langfuse_observe = _langfuse_observe()
+                observada = langfuse_observe(**kwargs)(func) if langfuse_observe else func
+            return observada(*args, **kw)
+
+        return wrapper
+
+    return decorator
+
+
+def get_langfuse():
+    """Cliente Langfuse do processo (importa o SDK sob demanda)."""
+    from langfuse import get_client
+
+    return get_client()
+
+
+def anexa_metadados(metadados: dict):
+    """
+    Anexa `metadados` ao span corrente do Langfuse, se houver. Só age quando o SDK
+    já foi importado pelo processo: quem não usa tracing (ex.: a carga) não paga nada.
+    """
+    if "langfuse" not in sys.modules:
+        return
+    try:
+        from opentelemetry import trace  # dependência do SDK do Langfuse
+
+        # Sem span ativo (ex.: threads sem o contexto de tracing) não há onde anexar
+        if trace.get_current_span().is_recording():
+            get_langfuse().update_current_span(metadata=metadados)
+    except Exception as e:  # instrumentação nunca interrompe o pipeline
+        print(f"⚠️ Métricas não anexadas ao Langfuse: {e}")
+
+
+def verifica_auth_em_background(langfuse) -> threading.Thread:
+    """Roda `auth_check()` numa thread daemon para não bloquear o início do pipeline."""
+
+    def verifica():
+        try:
+            ok = langfuse.auth_check()
+        except Exception as e:
+            print(f"Langfuse auth check failed: {e}")
+            return
+        if ok:
+            print("Langfuse client is authenticated and ready!")
+        else:
+            print("Authentication failed. Please check your credentials and host.")
+
+    thread = threading.Thread(target=verifica, name="langfuse-auth", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,95 @@
+import argparse
+import json
+import os
+import time
+
+import pandas as pd
+
+from src.utils.db_utils import DB_PATH
+
+# ===== BACKFILL HISTÓRICO DAS MÉTRICAS =====
+# Reconstrói, para uma série de datas de referência (as_of), as métricas principais e
+# as séries de 30 dias/12 meses que o Data Agent produziria em cada data, com uma
+# única varredura da rollup diária (ver `backfill_metricas`). Um JSON por data e um
+# CSV com as métricas de todas as datas, para auditoria.
+SAIDA_PADRAO = os.path.join("reports", "backfill")
+INICIO_PADRAO = "2019-01-01"
+FREQUENCIA_PADRAO = "W-SAT"  # semanas epidemiológicas terminam no sábado
+
+
+def datas_referencia(inicio, fim, frequencia=FREQUENCIA_PADRAO) -> pd.DatetimeIndex:
+    """Datas de referência entre `inicio` e `fim` (frequência do pandas, ex.: W-SAT, MS, D)."""
+    return pd.date_range(pd.Timestamp(inicio), pd.Timestamp(fim), freq=frequencia)
+
+
+def _serializa(resultado: dict) -> dict:
+    """Converte as datas das séries em texto ('AAAA-MM-DD' e 'AAAA-MM')."""
+    return {
+        **resultado,
+        "daily_cases": [
+            {"date": e["date"].strftime("%Y-%m-%d"), "cases": e["cases"]}
+            for e in resultado["daily_cases"]
+        ],
+        "monthly_cases": [
+            {"month": e["month"].strftime("%Y-%m"), "cases": e["cases"]}
+            for e in resultado["monthly_cases"]
+        ],
+    }
+
+
+def grava(resultados, diretorio=SAIDA_PADRAO) -> str:
+    """Grava `metricas_<as_of>.json` por data e `metricas.csv`; retorna o caminho do CSV."""
+    os.makedirs(diretorio, exist_ok=True)
+    linhas = []
+    for resultado in resultados:
+        caminho = os.path.join(diretorio, f"metricas_{resultado['as_of']}.json")
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump(_serializa(resultado), f, indent=2, ensure_ascii=False)
+        metrics = resultado["metrics"]
+        linhas.append(
+            {
+                "as_of": resultado["as_of"],
+                **{k: v for k, v in metrics.items() if k != "counts"},
+                **metrics["counts"],
+            }
+        )
+    caminho_csv = os.path.join(diretorio, "metricas.csv")
+    pd.DataFrame(linhas).to_csv(caminho_csv, index=False)
+    return caminho_csv
+
+
+def main(argv=None):
+    from src.agents.data_agent import _resolve_as_of, backfill_metricas
+
+    parser = argparse.ArgumentParser(
+        description="Reconstrói as métricas do relatório para várias datas de referência."
+    )
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--inicio", default=INICIO_PADRAO)
+    parser.add_argument("--fim", help="padrão: última data de notificação carregada")
+    parser.add_argument(
+        "--frequencia", default=FREQUENCIA_PADRAO, help="ex.: W-SAT (semanal), MS, D"
+    )
+    parser.add_argument("--saida", default=SAIDA_PADRAO)
+    parser.add_argument(
+        "--incluir-sem-data",
+        action="store_true",
+        help="soma os registros sem data de notificação em todas as datas (padrão: não)",
+    )
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        raise FileNotFoundError(f"Banco não encontrado: {args.db}")
+
+    datas = datas_referencia(args.inicio, _resolve_as_of(args.db, args.fim), args.frequencia)
+    inicio = time.perf_counter()
+    resultados = backfill_metricas(args.db, datas, args.incluir_sem_data)
+    caminho_csv = grava(resultados, args.saida)
+    print(
+        f"{len(resultados)} datas de referência em {time.perf_counter() - inicio:.2f}s "
+        f"-> {args.saida} (resumo em {caminho_csv})"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import os
+import warnings
+
+import pandas as pd
+
+# pyarrow é opcional: quando instalado, permite o leitor CSV multithread
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pv
+except ImportError:  # pragma: no cover - depende do ambiente
+    pa = None
+    pv = None
+
+# Formato dos arquivos do OpenDataSUS
+SEPARADOR = ";"
+ENCODING = "latin-1"
+ENGINES = ("pandas", "pyarrow")
+BLOCO_PYARROW = 4 << 20  # 4 MB por bloco lido
+
+
+def get_engine(engine: str = None) -> str:
+    """Resolve o engine de leitura (argumento, SRAG_CSV_ENGINE ou 'pandas')."""
+    engine = (engine or os.getenv("SRAG_CSV_ENGINE") or "pandas").lower()
+    if engine not in ENGINES:
+        raise ValueError(f"Engine de leitura inválido: {engine!r} (use {ENGINES})")
+    if engine == "pyarrow" and pv is None:
+        print("⚠️ pyarrow não instalado; usando o leitor do pandas.")
+        return "pandas"
+    return engine
+
+
+def _lotes_pandas(origem, colunas, tamanho_lote, relatorio):
+    """Leitor C do pandas: apenas as colunas pedidas, todas como texto."""
+    desejadas = set(colunas)
+    leitor = pd.read_csv(
+        origem,
+        sep=SEPARADOR,
+        encoding=ENCODING,
+        usecols=lambda c: c in desejadas,
+        dtype=str,
+        chunksize=tamanho_lote,
+        on_bad_lines="warn",
+    )
+    with leitor:
+        while True:
+            # Conta as linhas inválidas a partir dos avisos emitidos pelo parser
+            with warnings.catch_warnings(record=True) as avisos:
+                warnings.simplefilter("always", pd.errors.ParserWarning)
+                try:
+                    lote = next(leitor)
+                except StopIteration:
+                    return
+            for aviso in avisos:
+                relatorio["linhas_invalidas"] += str(aviso.message).count("Skipping line")
+            yield lote.reindex(columns=colunas)
+
+
+def _lotes_pyarrow(origem, colunas, tamanho_lote, relatorio):
+    """Leitor CSV do pyarrow (multithread), reagrupado em lotes de tamanho_lote."""
+
+    def linha_invalida(_linha):
+        relatorio["linhas_invalidas"] += 1
+        return "skip"
+
+    leitor = pv.open_csv(
+        origem,
+        read_options=pv.ReadOptions(encoding=ENCODING, block_size=BLOCO_PYARROW, use_threads=True),
+        parse_options=pv.ParseOptions(delimiter=SEPARADOR, invalid_row_handler=linha_invalida),
+        convert_options=pv.ConvertOptions(
+            include_columns=colunas,
+            include_missing_columns=True,
+            column_types={c: pa.string() for c in colunas},
+            strings_can_be_null=True,
+        ),
+    )
+    pendentes, n_pendentes = [], 0
+    for record_batch in leitor:
+        pendentes.append(record_batch)
+        n_pendentes += record_batch.num_rows
+        if n_pendentes < tamanho_lote:
+            continue
+        tabela = pa.Table.from_batches(pendentes)
+        inicio = 0
+        while tabela.num_rows - inicio >= tamanho_lote:
+            yield tabela.slice(inicio, tamanho_lote).to_pandas()
+            inicio += tamanho_lote
+        resto = tabela.slice(inicio)
+        pendentes, n_pendentes = resto.to_batches(), resto.num_rows
+    if n_pendentes:
+        yield pa.Table.from_batches(pendentes, schema=leitor.schema).to_pandas()
+
+
+def ler_csv_em_lotes(origem, colunas, tamanho_lote, engine=None, relatorio=None):
+    """
+    Lê um CSV do DATASUS (caminho ou arquivo binário) em lotes de DataFrame,
+    parseando somente `colunas`, todas como texto (colunas ausentes vêm nulas).
+    O dict `relatorio`, se informado, recebe o engine e as linhas inválidas ignoradas.
+    """
+    relatorio = relatorio if relatorio is not None else {}
+    relatorio.update(engine=get_engine(engine), linhas_invalidas=0)
+    if relatorio["engine"] == "pyarrow":
+        return _lotes_pyarrow(origem, list(colunas), tamanho_lote, relatorio)
+    return _lotes_pandas(origem, list(colunas), tamanho_lote, relatorio)
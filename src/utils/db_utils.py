@@ -1,14 +1,72 @@
+import argparse
+import hashlib
+import multiprocessing
 import os
+import queue
 import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 
 import pandas as pd
 
+from src.tools import instrumentation
+from src.tools.instrumentation import cronometra_iteracao, cronometro
+from src.utils.csv_reader import ler_csv_em_lotes
+
 # ===== CAMINHOS E CONSTANTES =====
 DATA_DIR = os.path.join("data", "srag_csvs")
 DB_PATH = "srag.db"
 TABELA = "srag_casos"
 BATCH_SIZE = 200000
 
+# Manifesto de ingestão: impressão digital de cada CSV e último lote gravado
+TABELA_MANIFESTO = "ingestao_manifesto"
+
+# Colunas do CSV original do DATASUS efetivamente usadas (as demais nem são parseadas)
+COLUNAS_CSV = [
+    "NU_NOTIFIC",
+    "DT_NOTIFIC",
+    "CS_SEXO",
+    "EVOLUCAO",
+    "CLASSI_FIN",
+    "UTI",
+    "VACINA_COV",
+    "VACINA",
+    "SG_UF",
+]
+
+# Tabelas de agregação (rollups) mantidas incrementalmente durante a carga
+TABELA_DIARIA = "srag_diario"
+TABELA_MENSAL = "srag_mensal"
+
+# Dimensões das rollups; valores nulos são gravados como '' para que a
+# chave primária funcione no UPSERT (NULLs nunca conflitam no SQLite).
+DIMENSOES_ROLLUP = [
+    "UF",
+    "CLASSIFICACAO_FINAL",
+    "DESFECHO",
+    "INTERNADO_UTI",
+    "VACINADO_COVID",
+    "VACINADO_GRIPE",
+    "SEXO_PACIENTE",
+]
+
+# Chave temporal de cada rollup: (coluna, expressão sobre DATA_NOTIFICACAO)
+ROLLUPS = {
+    TABELA_DIARIA: ("DATA_NOTIFICACAO", "COALESCE(DATA_NOTIFICACAO, '')"),
+    TABELA_MENSAL: ("MES", "COALESCE(substr(DATA_NOTIFICACAO, 1, 7), '')"),
+}
+
+# Índices de cobertura das rollups para as consultas do Data Agent. As séries por
+# mês/dia já usam a chave primária (que começa pela chave temporal); estes evitam a
+# B-tree temporária do GROUP BY nas distribuições mensais. Conferidos com
+# `python -m src.utils.index_advisor`.
+INDICES_ROLLUP = {
+    "idx_mensal_desfecho": (TABELA_MENSAL, ["MES", "DESFECHO", "CASOS"]),
+    "idx_mensal_classificacao": (TABELA_MENSAL, ["MES", "CLASSIFICACAO_FINAL", "CASOS"]),
+}
+
 # ===== DICIONÁRIOS DE MAPEAMENTO =====
 MAP_SEXO = {"M": "Masculino", "F": "Feminino", "I": "Ignorado"}
 
@@ -27,10 +85,66 @@ MAP_UTI = {1: "Sim", 2: "Não", 9: "Ignorado"}
 MAP_VACINA_COV = {1: "Sim", 2: "Não", 9: "Ignorado"}
 MAP_VACINA_GRIPE = {1: "Sim", 2: "Não", 9: "Ignorado"}
 
+# ===== SCHEMA COMPACTO (opcional) =====
+# Códigos inteiros + tabelas de dimensão; datas como dias desde 1970-01-01.
+# srag_casos vira uma VIEW com as colunas legíveis para manter compatibilidade.
+# Troca espaço por CPU: com 400k linhas sintéticas o arquivo cai de 115 MB para 64 MB,
+# mas varrer a view decodifica cada linha pelos LEFT JOINs (SELECT * 1,9s vs. 1,5s;
+# GROUP BY DESFECHO 0,42s vs. 0,22s). As consultas do relatório leem as rollups e
+# não são afetadas.
+TABELA_COMPACTA = "srag_casos_compacto"
+COD_SEXO = {"M": 1, "F": 2, "I": 9}
+
+# Coluna -> (tabela de dimensão, {código: descrição})
+DIMENSOES_COMPACTAS = {
+    "SEXO_PACIENTE": ("dim_sexo", {COD_SEXO[k]: v for k, v in MAP_SEXO.items()}),
+    "DESFECHO": ("dim_evolucao", MAP_EVOLUCAO),
+    "CLASSIFICACAO_FINAL": ("dim_classificacao_final", MAP_CLAS_FIN),
+    "INTERNADO_UTI": ("dim_uti", MAP_UTI),
+    "VACINADO_COVID": ("dim_vacina_cov", MAP_VACINA_COV),
+    "VACINADO_GRIPE": ("dim_vacina_gripe", MAP_VACINA_GRIPE),
+}
+
+COLUNAS_COMPACTAS = [
+    "NUMERO_DA_NOTIFICACAO",
+    "DIA_NOTIFICACAO",
+    *DIMENSOES_COMPACTAS,
+    "UF",
+]
+
+# Dia juliano de 1970-01-01: converte DATE texto <-> número de dias
+_EPOCH_JULIANO = 2440587.5
+
+
+def schema_compacto(con):
+    """Indica se o DB usa o schema compacto (srag_casos é uma view)."""
+    sql = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?"
+    return con.execute(sql, (TABELA_COMPACTA,)).fetchone() is not None
 
-def cria_tabela(con):
-    """Cria a tabela principal se não existir, com PRIMARY KEY."""
+
+def tabela_base(con):
+    """Tabela física onde os casos são gravados."""
+    return TABELA_COMPACTA if schema_compacto(con) else TABELA
+
+
+def cria_tabela(con, compacto=None):
+    """
+    Cria a tabela principal se não existir, com PRIMARY KEY.
+    Com compacto=True (ou SRAG_SCHEMA=compacto) um DB novo usa o schema compacto;
+    um DB existente mantém o schema com que foi criado.
+    """
+    if compacto is None:
+        compacto = os.getenv("SRAG_SCHEMA", "").lower() == "compacto"
     cur = con.cursor()
+    existe = cur.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (TABELA,)).fetchone()
+
+    if schema_compacto(con) or (compacto and existe is None):
+        cria_schema_compacto(con)
+        cria_rollups(con)
+        cria_manifesto(con)
+        con.commit()
+        return
+
     cur.execute(f"""
         CREATE TABLE IF NOT EXISTS {TABELA} (
             NUMERO_DA_NOTIFICACAO INTEGER PRIMARY KEY,
@@ -48,26 +162,267 @@ def cria_tabela(con):
         CREATE INDEX IF NOT EXISTS idx_data_notificacao
         ON {TABELA} (DATA_NOTIFICACAO);
     """)
+    cria_rollups(con)
+    cria_manifesto(con)
     con.commit()
 
 
-def preparar_batch(df):
-    """Seleciona, renomeia, tipa e traduz colunas."""
+def _cria_tabela_compacta(con):
+    """Cria as tabelas de dimensão e a tabela compacta (sem a view)."""
+    cur = con.cursor()
+    for tabela_dim, mapa in DIMENSOES_COMPACTAS.values():
+        cur.execute(f"""
+            CREATE TABLE IF NOT EXISTS {tabela_dim} (
+                CODIGO INTEGER PRIMARY KEY,
+                DESCRICAO TEXT NOT NULL UNIQUE
+            )
+        """)
+        cur.executemany(
+            f"INSERT OR IGNORE INTO {tabela_dim} (CODIGO, DESCRICAO) VALUES (?, ?)",
+            mapa.items(),
+        )
+    colunas_dim = ",\n".join(f"{c} INTEGER" for c in DIMENSOES_COMPACTAS)
+    cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TABELA_COMPACTA} (
+            NUMERO_DA_NOTIFICACAO INTEGER PRIMARY KEY,
+            DIA_NOTIFICACAO INTEGER,
+            {colunas_dim},
+            UF TEXT
+        )
+    """)
+
 
-    # Colunas que esperamos do CSV original
-    colunas_interesse = [
-        "NU_NOTIFIC",
-        "DT_NOTIFIC",
-        "CS_SEXO",
-        "EVOLUCAO",
-        "CLASSI_FIN",
-        "UTI",
-        "VACINA_COV",
-        "VACINA",
-        "SG_UF",
+def _cria_view_compacta(con):
+    """Cria o índice de data e a view srag_casos com as colunas legíveis."""
+    cur = con.cursor()
+    cur.execute(f"""
+        CREATE INDEX IF NOT EXISTS idx_data_notificacao
+        ON {TABELA_COMPACTA} (DIA_NOTIFICACAO);
+    """)
+    selects = [
+        "c.NUMERO_DA_NOTIFICACAO",
+        "date(c.DIA_NOTIFICACAO * 86400, 'unixepoch') AS DATA_NOTIFICACAO",
     ]
+    joins = []
+    for n, (coluna, (tabela_dim, _)) in enumerate(DIMENSOES_COMPACTAS.items()):
+        selects.append(f"d{n}.DESCRICAO AS {coluna}")
+        joins.append(f"LEFT JOIN {tabela_dim} d{n} ON d{n}.CODIGO = c.{coluna}")
+    selects.append("c.UF")
+    cur.execute(f"""
+        CREATE VIEW IF NOT EXISTS {TABELA} AS
+        SELECT {", ".join(selects)}
+        FROM {TABELA_COMPACTA} c
+        {" ".join(joins)}
+    """)
+
+
+def cria_schema_compacto(con):
+    """Cria o schema compacto completo: dimensões, tabela, índice e view."""
+    _cria_tabela_compacta(con)
+    _cria_view_compacta(con)
+
+
+def _select_compacto(alias):
+    """Expressões SQL que codificam as colunas legíveis de `alias` no schema compacto."""
+    expressoes = [
+        f"{alias}.NUMERO_DA_NOTIFICACAO",
+        f"CAST(julianday({alias}.DATA_NOTIFICACAO) - {_EPOCH_JULIANO} AS INTEGER)",
+    ]
+    for coluna, (tabela_dim, _) in DIMENSOES_COMPACTAS.items():
+        expressoes.append(f"(SELECT CODIGO FROM {tabela_dim} WHERE DESCRICAO = {alias}.{coluna})")
+    expressoes.append(f"{alias}.UF")
+    return ", ".join(expressoes)
+
+
+def codifica_compacto(df):
+    """Converte um lote preparado (colunas legíveis) para os códigos do schema compacto."""
+    df = df.copy()
+    datas = pd.to_datetime(df["DATA_NOTIFICACAO"], errors="coerce")
+    df["DIA_NOTIFICACAO"] = (datas - pd.Timestamp("1970-01-01")).dt.days.astype("Int64")
+    for coluna, (_, mapa) in DIMENSOES_COMPACTAS.items():
+        reverso = {v: k for k, v in mapa.items()}
+        df[coluna] = df[coluna].map(reverso).astype("Int64")
+    return df[COLUNAS_COMPACTAS]
+
+
+def migra_para_compacto(con):
+    """Converte um DB existente do schema legível para o compacto (e executa VACUUM)."""
+    if schema_compacto(con):
+        print("O banco já usa o schema compacto.")
+        return
+    cur = con.cursor()
+    _cria_tabela_compacta(con)
+    colunas = ", ".join(COLUNAS_COMPACTAS)
+    cur.execute(f"""
+        INSERT OR IGNORE INTO {TABELA_COMPACTA} ({colunas})
+        SELECT {_select_compacto("s")} FROM {TABELA} s
+    """)
+    cur.execute(f"DROP TABLE {TABELA}")
+    _cria_view_compacta(con)
+    con.commit()
+    cur.execute("VACUUM")
+    print("Migração para o schema compacto concluída.")
+
+
+def cria_rollups(con):
+    """Cria as tabelas de agregação diária e mensal (e seus índices) se não existirem."""
+    cur = con.cursor()
+    dimensoes = ", ".join(f"{d} TEXT NOT NULL" for d in DIMENSOES_ROLLUP)
+    for tabela, (chave, _) in ROLLUPS.items():
+        pk = ", ".join([chave, *DIMENSOES_ROLLUP])
+        cur.execute(f"""
+            CREATE TABLE IF NOT EXISTS {tabela} (
+                {chave} TEXT NOT NULL,
+                {dimensoes},
+                CASOS INTEGER NOT NULL,
+                PRIMARY KEY ({pk})
+            ) WITHOUT ROWID
+        """)
+    for indice, (tabela, colunas) in INDICES_ROLLUP.items():
+        cur.execute(f"CREATE INDEX IF NOT EXISTS {indice} ON {tabela} ({', '.join(colunas)})")
+
+
+def _sql_rollup(tabela, origem, upsert=True, contagem="COUNT(*)"):
+    """Monta o INSERT ... SELECT que agrega `origem` na rollup `tabela`."""
+    chave, expr_chave = ROLLUPS[tabela]
+    colunas = ", ".join([chave, *DIMENSOES_ROLLUP, "CASOS"])
+    dims = ", ".join(f"COALESCE({d}, '')" for d in DIMENSOES_ROLLUP)
+    grupos = ", ".join(str(n) for n in range(1, len(DIMENSOES_ROLLUP) + 2))
+    sql = f"""
+        INSERT INTO {tabela} ({colunas})
+        SELECT {expr_chave}, {dims}, {contagem}
+        FROM {origem}
+        WHERE true
+        GROUP BY {grupos}
+    """
+    if upsert:
+        pk = ", ".join([chave, *DIMENSOES_ROLLUP])
+        sql += f" ON CONFLICT ({pk}) DO UPDATE SET CASOS = CASOS + excluded.CASOS"
+    return sql
+
+
+def atualiza_rollups(con, origem):
+    """Soma nas rollups as linhas de `origem` (apenas registros novos)."""
+    cur = con.cursor()
+    for tabela in ROLLUPS:
+        cur.execute(_sql_rollup(tabela, origem))
+
+
+def reconstroi_rollups(con):
+    """
+    Recalcula as rollups do zero: a diária a partir de toda a tabela principal e a
+    mensal a partir da diária (uma só varredura de srag_casos, que no schema compacto
+    passa pelos LEFT JOINs da view).
+    """
+    cur = con.cursor()
+    for tabela in ROLLUPS:
+        cur.execute(f"DELETE FROM {tabela}")
+    cur.execute(_sql_rollup(TABELA_DIARIA, TABELA, upsert=False))
+    cur.execute(_sql_rollup(TABELA_MENSAL, TABELA_DIARIA, upsert=False, contagem="SUM(CASOS)"))
+    con.commit()
+
+
+def rollups_desatualizadas(con):
+    """Indica se há casos carregados mas as rollups estão vazias (DB antigo)."""
+    cur = con.cursor()
+    tem_casos = cur.execute(f"SELECT EXISTS (SELECT 1 FROM {TABELA})").fetchone()[0]
+    tem_rollup = cur.execute(f"SELECT EXISTS (SELECT 1 FROM {TABELA_DIARIA})").fetchone()[0]
+    return bool(tem_casos) and not tem_rollup
+
+
+def cria_manifesto(con):
+    """Cria a tabela de manifesto de ingestão se não existir."""
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TABELA_MANIFESTO} (
+            ARQUIVO TEXT PRIMARY KEY,
+            TAMANHO INTEGER NOT NULL,
+            MTIME_NS INTEGER NOT NULL,
+            SHA256 TEXT NOT NULL,
+            TAMANHO_LOTE INTEGER NOT NULL,
+            ULTIMO_LOTE INTEGER NOT NULL DEFAULT 0,
+            CONCLUIDO INTEGER NOT NULL DEFAULT 0,
+            ATUALIZADO_EM TEXT NOT NULL
+        )
+    """)
+
+
+def _hash_arquivo(caminho, bloco=8 << 20):
+    """SHA-256 do conteúdo do arquivo, lido em blocos."""
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        while dados := f.read(bloco):
+            h.update(dados)
+    return h.hexdigest()
+
+
+def planeja_arquivo(con, caminho_csv, forcar=False):
+    """
+    Consulta o manifesto e decide o que fazer com o CSV:
+    None se o arquivo já foi carregado por completo e não mudou; caso contrário,
+    o número de lotes já gravados (0 = processar do início).
+    O hash só é recalculado quando tamanho ou mtime mudaram.
+    """
+    nome = os.path.basename(caminho_csv)
+    st = os.stat(caminho_csv)
+    linha = con.execute(
+        f"SELECT TAMANHO, MTIME_NS, SHA256, TAMANHO_LOTE, ULTIMO_LOTE, CONCLUIDO "
+        f"FROM {TABELA_MANIFESTO} WHERE ARQUIVO = ?",
+        (nome,),
+    ).fetchone()
+
+    if linha and (linha[0], linha[1]) == (st.st_size, st.st_mtime_ns):
+        sha = linha[2]
+    else:
+        sha = _hash_arquivo(caminho_csv)
+
+    agora = datetime.now().isoformat(timespec="seconds")
+    if not forcar and linha and linha[2] == sha and linha[3] == BATCH_SIZE:
+        # Conteúdo igual: só atualiza o mtime (ex.: arquivo baixado de novo)
+        con.execute(
+            f"UPDATE {TABELA_MANIFESTO} SET MTIME_NS = ? WHERE ARQUIVO = ?",
+            (st.st_mtime_ns, nome),
+        )
+        con.commit()
+        return None if linha[5] else linha[4]
+
+    con.execute(
+        f"""
+        INSERT OR REPLACE INTO {TABELA_MANIFESTO}
+            (ARQUIVO, TAMANHO, MTIME_NS, SHA256, TAMANHO_LOTE, ULTIMO_LOTE, CONCLUIDO, ATUALIZADO_EM)
+        VALUES (?, ?, ?, ?, ?, 0, 0, ?)
+        """,
+        (nome, st.st_size, st.st_mtime_ns, sha, BATCH_SIZE, agora),
+    )
+    con.commit()
+    return 0
+
+
+def registra_lote(con, nome, lote, concluido=False):
+    """Registra no manifesto o último lote gravado (sem commit: vai na transação do lote)."""
+    con.execute(
+        f"UPDATE {TABELA_MANIFESTO} SET ULTIMO_LOTE = ?, CONCLUIDO = ?, ATUALIZADO_EM = ? "
+        f"WHERE ARQUIVO = ?",
+        (lote, int(concluido), datetime.now().isoformat(timespec="seconds"), nome),
+    )
+
+
+def _arquivos_a_processar(con, caminhos, forcar=False):
+    """Filtra os CSVs pelo manifesto; retorna [(caminho, lotes_ja_gravados)]."""
+    pendentes = []
+    for caminho in caminhos:
+        pular_ate = planeja_arquivo(con, caminho, forcar)
+        if pular_ate is None:
+            print(f"Sem alterações desde a última carga: {os.path.basename(caminho)}")
+        else:
+            pendentes.append((caminho, pular_ate))
+    return pendentes
+
+
+def preparar_batch(df):
+    """Seleciona, renomeia, tipa e traduz colunas."""
 
-    df_filtrado = df[colunas_interesse].copy()
+    # Colunas que esperamos do CSV original (ausentes em anos antigos viram nulas)
+    df_filtrado = df.reindex(columns=COLUNAS_CSV)
     # Renomeia colunas
     df_filtrado.rename(
         columns={
@@ -142,85 +497,411 @@ def preparar_batch(df):
     return df_filtrado
 
 
-def processar_csv(con, caminho_csv):
+COLUNAS_DB = [
+    "NUMERO_DA_NOTIFICACAO",
+    "DATA_NOTIFICACAO",
+    "SEXO_PACIENTE",
+    "DESFECHO",
+    "CLASSIFICACAO_FINAL",
+    "INTERNADO_UTI",
+    "VACINADO_COVID",
+    "VACINADO_GRIPE",
+    "UF",
+]
+TABELA_TEMPORARIA = "temp_srag_batch"
+TABELA_NOVOS = "temp.temp_srag_novos"
+
+
+def ler_batches(caminho_csv, relatorio=None):
+    """
+    Lê o CSV do DATASUS em lotes de BATCH_SIZE linhas, apenas com COLUNAS_CSV.
+    O engine (pandas ou pyarrow) vem de SRAG_CSV_ENGINE; `relatorio` recebe as
+    linhas inválidas ignoradas.
+    """
+    return ler_csv_em_lotes(caminho_csv, COLUNAS_CSV, BATCH_SIZE, relatorio=relatorio)
+
+
+def _imprime_linhas_invalidas(relatorio):
+    """Informa as linhas mal formadas ignoradas pelo leitor, se houver."""
+    if relatorio.get("linhas_invalidas"):
+        print(f"Linhas inválidas ignoradas: {relatorio['linhas_invalidas']}")
+
+
+def inserir_batch(con, df):
+    """
+    Insere um lote já preparado: separa os registros novos, atualiza as rollups
+    com eles e grava em srag_casos. Não faz commit; retorna quantos foram inseridos.
+    """
+    colunas_str = ", ".join([f'"{c}"' for c in COLUNAS_DB])
+    base = tabela_base(con)
+    cur = con.cursor()
+
+    # 1. Insere o lote em uma tabela temporária
+    df.to_sql(TABELA_TEMPORARIA, con, if_exists="replace", index=False)
+
+    # 2. Separa apenas os registros que ainda não existem na tabela
+    cur.execute(f"DROP TABLE IF EXISTS {TABELA_NOVOS}")
+    cur.execute(f"""
+        CREATE TEMP TABLE temp_srag_novos AS
+        SELECT {colunas_str}
+        FROM {TABELA_TEMPORARIA} t
+        WHERE NOT EXISTS (
+            SELECT 1 FROM {base} s
+            WHERE s.NUMERO_DA_NOTIFICACAO = t.NUMERO_DA_NOTIFICACAO
+        );
+    """)
+
+    # 3. Atualiza as rollups somente com as linhas novas
+    atualiza_rollups(con, TABELA_NOVOS)
+
+    if base == TABELA_COMPACTA:
+        cur.execute(f"""
+            INSERT OR IGNORE INTO {TABELA_COMPACTA} ({", ".join(COLUNAS_COMPACTAS)})
+            SELECT {_select_compacto("n")}
+            FROM {TABELA_NOVOS} n;
+        """)
+    else:
+        cur.execute(f"""
+            INSERT OR IGNORE INTO {TABELA} ({colunas_str})
+            SELECT {colunas_str}
+            FROM {TABELA_NOVOS};
+        """)
+
+    # 4. Conta quantos registros foram inseridos
+    return cur.rowcount
+
+
+def limpa_temporarias(con):
+    """Remove as tabelas temporárias usadas na inserção dos lotes."""
+    cur = con.cursor()
+    try:
+        cur.execute(f"DROP TABLE IF EXISTS {TABELA_TEMPORARIA}")
+        cur.execute(f"DROP TABLE IF EXISTS {TABELA_NOVOS}")
+    except Exception as e_drop:
+        print(f"\nAviso: Não foi possível limpar tabela temporária. {e_drop}")
+
+
+def processar_csv(con, caminho_csv, nome=None, forcar=False):
     """
     Processa CSV em batchs e insere apenas registros novos
     usando INSERT OR IGNORE para máxima compatibilidade.
+    Arquivos em disco passam pelo manifesto de ingestão: se não mudaram desde a
+    última carga completa são ignorados, e cargas interrompidas continuam do
+    último lote gravado (forcar=True reprocessa do início).
+    `caminho_csv` também pode ser um arquivo binário aberto (ex.: corpo de uma
+    resposta HTTP); nesse caso `nome` identifica a origem nas mensagens.
     """
-    print(f"\nProcessando: {os.path.basename(caminho_csv)}")
-
-    colunas_db = [
-        "NUMERO_DA_NOTIFICACAO",
-        "DATA_NOTIFICACAO",
-        "SEXO_PACIENTE",
-        "DESFECHO",
-        "CLASSIFICACAO_FINAL",
-        "INTERNADO_UTI",
-        "VACINADO_COVID",
-        "VACINADO_GRIPE",
-        "UF",
-    ]
-    colunas_str = ", ".join([f'"{c}"' for c in colunas_db])
-    tabela_temporaria = "temp_srag_batch"
+    nome = nome or os.path.basename(caminho_csv)
+    usa_manifesto = isinstance(caminho_csv, (str, os.PathLike))
+    print(f"\nProcessando: {nome}")
+
+    pular_ate = planeja_arquivo(con, caminho_csv, forcar) if usa_manifesto else 0
+    if pular_ate is None:
+        print(f"Sem alterações desde a última carga: {nome}")
+        return
+    if pular_ate:
+        print(f"Retomando após o lote {pular_ate} (manifesto de ingestão)")
 
-    cur = con.cursor()
     total_lidos_arquivo = 0
     total_inseridos_arquivo = 0
     i = 0
+    inicio = time.perf_counter()
+    relatorio = {}
 
     try:
-        batch_iter = pd.read_csv(
-            caminho_csv,
-            sep=";",
-            encoding="latin-1",
-            low_memory=False,
-            chunksize=BATCH_SIZE,
-            on_bad_lines="warn",
-        )
-        # 1. Processa cada batch separadamente
-        for i, batch in enumerate(batch_iter, start=1):
-            df = preparar_batch(batch)
+        # Processa cada batch separadamente
+        # Leitura, transformação e inserção de cada lote são medidas separadamente
+        lotes = cronometra_iteracao(ler_batches(caminho_csv, relatorio), "carga.leitura")
+        for i, batch in enumerate(lotes, start=1):
+            if i <= pular_ate:
+                continue  # lote já gravado em uma execução anterior
+
+            with cronometro("carga.transformacao", linhas=len(batch)):
+                df = preparar_batch(batch)
             total_lidos_arquivo += len(df)
 
-            if not df.empty:
-                # 2. Insere o lote em uma tabela temporária
-                df.to_sql(tabela_temporaria, con, if_exists="replace", index=False)
-                sql_insert = f"""
-                    INSERT OR IGNORE INTO {TABELA} ({colunas_str})
-                    SELECT {colunas_str}
-                    FROM {tabela_temporaria};
-                """
-                cur.execute(sql_insert)
-
-                # 3. Conta quantos registros foram inseridos
-                inseridos_neste_lote = cur.rowcount
-                total_inseridos_arquivo += inseridos_neste_lote
+            with cronometro("carga.insercao", linhas=len(df)) as medicao:
+                if not df.empty:
+                    inseridos_neste_lote = inserir_batch(con, df)
+                    total_inseridos_arquivo += inseridos_neste_lote
+                    medicao["inseridos"] = inseridos_neste_lote
+                    print(f"Lote {i}: {len(df)} lidos | {inseridos_neste_lote} inseridos")
 
+                # O checkpoint do manifesto é gravado na mesma transação do lote
+                if usa_manifesto:
+                    registra_lote(con, nome, i)
                 con.commit()
 
-                print(f"Lote {i}: {len(df)} lidos | {inseridos_neste_lote} inseridos")
+        if usa_manifesto:
+            registra_lote(con, nome, i, concluido=True)
+            con.commit()
 
         print(
             f"\nTotal inserido no arquivo: {total_inseridos_arquivo} (de {total_lidos_arquivo} lidos)"
         )
+        _imprime_linhas_invalidas(relatorio)
+        _imprime_vazao(total_lidos_arquivo, time.perf_counter() - inicio)
 
     except Exception as e:
         con.rollback()  # Desfaz a transação em caso de erro no lote
-        print(f"\nErro ao processar Lote {i} de {caminho_csv}: {e}")
+        print(f"\nErro ao processar Lote {i} de {nome}: {e}")
     finally:
         # Limpa a tabela temporária
+        limpa_temporarias(con)
+
+
+def _imprime_vazao(linhas, segundos):
+    """Exibe a vazão da carga em linhas por segundo."""
+    vazao = linhas / segundos if segundos > 0 else 0
+    print(f"Tempo: {segundos:.1f}s | {vazao:,.0f} linhas/s")
+
+
+# ===== CARGA EM MASSA (carga inicial / recarga completa) =====
+# journal em memória (não OFF): sem journal o SQLite não consegue desfazer a transação
+# de um arquivo que falha no meio, e o ROLLBACK deixaria linhas parciais e índices
+# inconsistentes em srag_casos
+PRAGMAS_CARGA = {
+    "journal_mode": "MEMORY",
+    "synchronous": "OFF",
+    "cache_size": -262144,  # ~256 MB
+    "temp_store": "MEMORY",
+}
+
+
+def _linhas_tipadas(df, colunas_db):
+    """Converte o lote preparado em tuplas Python (NaN -> None) para executemany."""
+    colunas = []
+    for c in colunas_db:
+        serie = df[c].astype(object)
+        serie[serie.isna()] = None
+        colunas.append(serie.tolist())
+    return zip(*colunas, strict=True)
+
+
+def carga_bulk(con, caminhos, forcar=False):
+    """
+    Carga em massa para a carga inicial e recargas completas: insere direto em
+    srag_casos com executemany, uma transação por arquivo, PRAGMAs de carga,
+    índice criado só ao final e rollups reconstruídas de uma vez.
+    """
+    cur = con.cursor()
+    originais = {p: cur.execute(f"PRAGMA {p}").fetchone()[0] for p in PRAGMAS_CARGA}
+    base = tabela_base(con)
+    colunas_db = COLUNAS_COMPACTAS if base == TABELA_COMPACTA else COLUNAS_DB
+    placeholders = ", ".join("?" for _ in colunas_db)
+    colunas_str = ", ".join([f'"{c}"' for c in colunas_db])
+    sql_insert = f"INSERT OR IGNORE INTO {base} ({colunas_str}) VALUES ({placeholders})"
+
+    for pragma, valor in PRAGMAS_CARGA.items():
+        cur.execute(f"PRAGMA {pragma} = {valor}")
+    cur.execute("DROP INDEX IF EXISTS idx_data_notificacao")
+    con.commit()
+
+    inicio_total = time.perf_counter()
+    total_lidos = 0
+    try:
+        # Carga em massa grava um arquivo por transação: não há retomada no meio do arquivo
+        for caminho_csv, _ in _arquivos_a_processar(con, caminhos, forcar):
+            print(f"\nCarga em massa: {os.path.basename(caminho_csv)}")
+            inicio = time.perf_counter()
+            lidos = inseridos = i = 0
+            relatorio = {}
+            try:
+                for i, batch in enumerate(ler_batches(caminho_csv, relatorio), start=1):
+                    df = preparar_batch(batch)
+                    linhas = codifica_compacto(df) if base == TABELA_COMPACTA else df
+                    antes = con.total_changes
+                    cur.executemany(sql_insert, _linhas_tipadas(linhas, colunas_db))
+                    lidos += len(df)
+                    inseridos += con.total_changes - antes
+                    print(f"Lote {i}: {len(df)} lidos | {con.total_changes - antes} inseridos")
+                registra_lote(con, os.path.basename(caminho_csv), i, concluido=True)
+                con.commit()
+            except Exception as e:
+                con.rollback()
+                print(f"\nErro na carga em massa de {caminho_csv}: {e}")
+                continue
+            total_lidos += lidos
+            print(f"\nTotal inserido no arquivo: {inseridos} (de {lidos} lidos)")
+            _imprime_linhas_invalidas(relatorio)
+            _imprime_vazao(lidos, time.perf_counter() - inicio)
+
+        print("\nCriando índice e reconstruindo rollups...")
+        cria_tabela(con)
+        reconstroi_rollups(con)
+        print("\nCarga em massa concluída:")
+        _imprime_vazao(total_lidos, time.perf_counter() - inicio_total)
+    finally:
+        for pragma, valor in originais.items():
+            cur.execute(f"PRAGMA {pragma} = {valor}")
+
+
+# ===== CARGA PARALELA (vários produtores, um único escritor) =====
+# Cada arquivo tem sua fila limitada e o escritor grava os arquivos na ordem de
+# entrada, como na carga sequencial: com NU_NOTIFIC repetido entre arquivos, o
+# INSERT OR IGNORE mantém sempre a linha do primeiro arquivo.
+_filas_produtor = None
+_parar_produtor = None
+
+
+def _inicia_produtor(filas, parar):
+    """Inicializador dos processos produtores: guarda as filas e o sinal de parada."""
+    global _filas_produtor, _parar_produtor
+    _filas_produtor = filas
+    _parar_produtor = parar
+    # Ao abortar, os lotes não lidos são descartados sem travar a saída do processo
+    for fila in filas:
+        fila.cancel_join_thread()
+
+
+def _produz_batches(indice, caminho_csv, pular_ate=0):
+    """
+    Executado em um processo do pool: lê e prepara os lotes de um CSV e os
+    envia ao escritor pela fila do arquivo. Ao final envia (None, relatorio); em
+    erro, (lote, exceção). Lotes até `pular_ate` já foram gravados antes e não
+    são transformados. Para se o escritor sinalizar a interrupção da carga.
+    """
+    fila = _filas_produtor[indice]
+    i = 0
+    relatorio = {}
+    try:
+        for i, batch in enumerate(ler_batches(caminho_csv, relatorio), start=1):
+            if _parar_produtor.is_set():
+                return
+            if i > pular_ate:
+                fila.put((i, preparar_batch(batch)))
+    except Exception as e:
+        fila.put((i, e))
+        return
+    fila.put((None, relatorio))
+
+
+def _drena_filas(filas, futuros):
+    """Esvazia as filas até todos os produtores terminarem (nenhum fica preso no put)."""
+    while not all(f.done() for f in futuros):
+        for fila in filas:
+            try:
+                while True:
+                    fila.get_nowait()
+            except queue.Empty:
+                pass
+        time.sleep(0.05)
+
+
+def _consome_arquivo(con, fila, futuro, nome):
+    """Grava os lotes de um arquivo na ordem em que chegam; retorna (lidos, inseridos)."""
+    lidos = inseridos = 0
+    com_erro = False
+    while True:
+        try:
+            i, df = fila.get(timeout=1)
+        except queue.Empty:
+            # Produtor morto sem sinalizar o fim: não há mais o que esperar
+            if futuro.done() and fila.empty():
+                if futuro.exception() is not None:
+                    print(f"\nErro no produtor de {nome}: {futuro.exception()}")
+                return lidos, inseridos
+            continue
+
+        if isinstance(df, Exception):
+            print(f"\nErro ao processar Lote {i} de {nome}: {df}")
+            return lidos, inseridos
+        if i is None:
+            if not com_erro:
+                con.execute(
+                    f"UPDATE {TABELA_MANIFESTO} SET CONCLUIDO = 1 WHERE ARQUIVO = ?", (nome,)
+                )
+                con.commit()
+                print(f"\n{nome}: total inserido {inseridos} (de {lidos} lidos)")
+                _imprime_linhas_invalidas(df)
+            return lidos, inseridos
+
+        # Após um erro de escrita, apenas drena os lotes restantes do arquivo
+        if com_erro:
+            continue
+
         try:
-            cur.execute(f"DROP TABLE IF EXISTS {tabela_temporaria}")
-        except Exception as e_drop:
-            print(f"\nAviso: Não foi possível limpar tabela temporária. {e_drop}")
+            n = inserir_batch(con, df) if not df.empty else 0
+            registra_lote(con, nome, i)
+            con.commit()
+        except Exception as e:
+            con.rollback()
+            com_erro = True
+            print(f"\nErro ao gravar Lote {i} de {nome}: {e}")
+            continue
+
+        lidos += len(df)
+        inseridos += n
+        print(f"{nome} | Lote {i}: {len(df)} lidos | {n} inseridos")
 
 
-def main():
-    """Função principal para orquestrar a carga de dados."""
+def processar_csvs_paralelo(con, caminhos, workers=None, tamanho_fila=None, forcar=False):
+    """
+    Lê e transforma os CSVs em um pool de processos enquanto o processo atual é
+    o único escritor no SQLite, gravando os arquivos na ordem de `caminhos`.
+    O manifesto de ingestão é consultado antes e atualizado a cada lote gravado.
+    """
+    planejados = _arquivos_a_processar(con, caminhos, forcar)
+    if not planejados:
+        return {}
+    caminhos = [c for c, _ in planejados]
+    workers = workers or min(len(caminhos), os.cpu_count() or 1)
+    mp_ctx = multiprocessing.get_context()
+    # Uma fila limitada por arquivo: produtores adiantados param quando a sua enche
+    filas = [mp_ctx.Queue(maxsize=tamanho_fila or 2) for _ in caminhos]
+    parar = mp_ctx.Event()
+
+    print(f"\nCarga paralela: {len(caminhos)} arquivos, {workers} processos produtores")
+    inseridos = {}
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=mp_ctx,
+        initializer=_inicia_produtor,
+        initargs=(filas, parar),
+    ) as pool:
+        # Submetidos em ordem: o produtor do arquivo sendo gravado sempre já começou
+        futuros = [
+            pool.submit(_produz_batches, k, c, pular) for k, (c, pular) in enumerate(planejados)
+        ]
+        try:
+            for fila, futuro, caminho in zip(filas, futuros, caminhos, strict=True):
+                nome = os.path.basename(caminho)
+                _, inseridos[nome] = _consome_arquivo(con, fila, futuro, nome)
+        except BaseException:
+            # Interrupção (ex.: Ctrl+C): libera produtores presos em put() antes do shutdown
+            parar.set()
+            for futuro in futuros:
+                futuro.cancel()
+            _drena_filas(filas, futuros)
+            raise
+        finally:
+            limpa_temporarias(con)
+
+    return inseridos
+
+
+def abre_banco(db_path=DB_PATH, compacto=None):
+    """Abre o DB, cria as tabelas necessárias e reconstrói rollups de DBs antigos."""
+    con = sqlite3.connect(db_path)
+    cria_tabela(con, compacto=compacto)
+    if rollups_desatualizadas(con):
+        print("Rollups vazias: reconstruindo a partir de srag_casos...")
+        reconstroi_rollups(con)
+    return con
+
+
+def main(paralelo=False, workers=None, bulk=False, compacto=None, forcar=False):
+    """
+    Função principal para orquestrar a carga de dados.
+    Com paralelo=True, a leitura/transformação dos CSVs roda em um pool de processos.
+    Com bulk=True, usa a carga em massa (indicada para a carga inicial/recarga completa).
+    Com compacto=True, um DB novo é criado com o schema compacto.
+    Com forcar=True, ignora o manifesto e reprocessa todos os arquivos.
+    """
     print("\nIniciando atualização incremental SRAG - DATASUS")
 
-    con = sqlite3.connect(DB_PATH)
-    cria_tabela(con)
+    con = abre_banco(compacto=compacto)
 
     try:
         arquivos = sorted([f for f in os.listdir(DATA_DIR) if f.endswith(".csv")])
@@ -230,11 +911,21 @@ def main():
 
         print(f"Encontrados {len(arquivos)} arquivos CSV para processar.")
 
-        for csv in arquivos:
-            caminho = os.path.join(DATA_DIR, csv)
-            processar_csv(con, caminho)
+        caminhos = [os.path.join(DATA_DIR, csv) for csv in arquivos]
+        if bulk:
+            carga_bulk(con, caminhos, forcar=forcar)
+        elif paralelo:
+            processar_csvs_paralelo(con, caminhos, workers=workers, forcar=forcar)
+        else:
+            for caminho in caminhos:
+                processar_csv(con, caminho, forcar=forcar)
 
         print("\nAtualização incremental concluída com sucesso!")
+        print("Tempo por etapa da carga:")
+        instrumentation.imprime_resumo()
+        caminhos = instrumentation.exporta("carga")
+        if caminhos:
+            print(f"Métricas da carga: {caminhos['json']} | {caminhos['prometheus']}")
 
     except Exception as e:
         print(f"\n❌ Erro durante a execução: {e}")
@@ -244,4 +935,35 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Carga dos CSVs SRAG no SQLite.")
+    parser.add_argument(
+        "--paralelo", action="store_true", help="lê e transforma os CSVs em processos paralelos"
+    )
+    parser.add_argument("--workers", type=int, default=None, help="número de processos produtores")
+    parser.add_argument(
+        "--bulk", action="store_true", help="carga em massa para carga inicial/recarga completa"
+    )
+    parser.add_argument(
+        "--compacto", action="store_true", help="cria um DB novo com o schema compacto"
+    )
+    parser.add_argument(
+        "--forcar", action="store_true", help="ignora o manifesto e reprocessa todos os CSVs"
+    )
+    parser.add_argument(
+        "--migrar-compacto", action="store_true", help="converte o DB existente para o compacto"
+    )
+    args = parser.parse_args()
+    if args.migrar_compacto:
+        con_migracao = sqlite3.connect(DB_PATH)
+        try:
+            migra_para_compacto(con_migracao)
+        finally:
+            con_migracao.close()
+    else:
+        main(
+            paralelo=args.paralelo,
+            workers=args.workers,
+            bulk=args.bulk,
+            compacto=args.compacto or None,
+            forcar=args.forcar,
+        )
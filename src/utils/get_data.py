@@ -1,8 +1,14 @@
+import argparse
+import json
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
 import requests
 from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
 
 # URL base
 BASE_URL = "https://opendatasus.saude.gov.br"
@@ -12,11 +18,52 @@ DEFAULT_DATASET_URL = f"{BASE_URL}/dataset/srag-2021-a-2024"
 OUTPUT_DIR = os.path.join("data", "srag_csvs")
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+# Parâmetros de download
+CHUNK_SIZE = 1 << 20  # 1 MB por bloco gravado
+TIMEOUT = 60
+TENTATIVAS = 5
+DOWNLOAD_WORKERS = 4
 
-def fetch_html(url: str) -> BeautifulSoup:
+
+def cria_sessao(pool_size: int = DOWNLOAD_WORKERS) -> requests.Session:
+    """Sessão HTTP keep-alive com pool de conexões para downloads concorrentes."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class Progresso:
+    """Acumula bytes e arquivos baixados por várias threads e exibe a vazão agregada."""
+
+    def __init__(self, total_arquivos: int):
+        self.total_arquivos = total_arquivos
+        self.arquivos = 0
+        self.bytes = 0
+        self.inicio = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def adiciona_bytes(self, n: int):
+        with self._lock:
+            self.bytes += n
+
+    def conclui_arquivo(self, name: str):
+        with self._lock:
+            self.arquivos += 1
+            print(f"[{self.arquivos}/{self.total_arquivos}] {name} | {self.resumo()}")
+
+    def resumo(self) -> str:
+        segundos = time.perf_counter() - self.inicio
+        mb = self.bytes / 1e6
+        vazao = mb / segundos if segundos > 0 else 0
+        return f"{mb:.1f} MB em {segundos:.1f}s ({vazao:.1f} MB/s)"
+
+
+def fetch_html(url: str, session=None) -> BeautifulSoup:
     """Faz a requisição e retorna o conteúdo HTML parseado."""
     try:
-        response = requests.get(url, timeout=30)
+        response = (session or requests).get(url, timeout=30)
         response.raise_for_status()
         return BeautifulSoup(response.text, "html.parser")
     except Exception as e:
@@ -35,50 +82,185 @@ def get_csv_links(soup: BeautifulSoup) -> list[tuple[str, str]]:
     return links
 
 
-def download_csv(name: str, url: str):
-    """Baixa o CSV se for novo ou atualizado."""
-    filepath = os.path.join(OUTPUT_DIR, name)
+def _le_meta(caminho):
+    """Lê o arquivo de metadados (ETag/Last-Modified) de um download, se existir."""
     try:
-        # Verifica se já existe
-        if os.path.exists(filepath):
-            local_size = os.path.getsize(filepath)
-            remote_head = requests.head(url)
-            remote_size = int(remote_head.headers.get("Content-Length", 0))
+        with open(caminho, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _grava_meta(caminho, resposta):
+    """Guarda os validadores HTTP da resposta para requisições condicionais futuras."""
+    meta = {
+        "etag": resposta.headers.get("ETag"),
+        "last_modified": resposta.headers.get("Last-Modified"),
+    }
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    return meta
+
+
+def _remove(*caminhos):
+    """Remove arquivos auxiliares, ignorando os inexistentes."""
+    for caminho in caminhos:
+        if os.path.exists(caminho):
+            os.remove(caminho)
+
 
-            if local_size == remote_size:
+def download_csv(
+    name: str,
+    url: str,
+    output_dir: str = OUTPUT_DIR,
+    session=None,
+    tentativas: int = TENTATIVAS,
+    timeout: int = TIMEOUT,
+    progresso: Progresso = None,
+):
+    """
+    Baixa o CSV se for novo ou atualizado, em streaming (memória limitada).
+
+    - usa ETag/Last-Modified salvos em `<arquivo>.meta.json` (requisição condicional);
+    - grava em `<arquivo>.part` e retoma com HTTP Range após quedas de conexão;
+    - move para o destino final de forma atômica ao terminar.
+
+    Retorna o caminho quando um novo conteúdo foi salvo; None caso contrário.
+    """
+    http = session or requests
+    filepath = os.path.join(output_dir, name)
+    parte = filepath + ".part"
+    meta_path = filepath + ".meta.json"
+    meta_parte_path = parte + ".meta.json"
+
+    try:
+        meta = _le_meta(meta_path) if os.path.exists(filepath) else {}
+
+        # Sem metadados de um download anterior: compara o tamanho, como antes
+        if os.path.exists(filepath) and not (meta.get("etag") or meta.get("last_modified")):
+            remote_head = http.head(url, timeout=timeout, allow_redirects=True)
+            remote_size = int(remote_head.headers.get("Content-Length", 0))
+            if os.path.getsize(filepath) == remote_size:
                 print(f"Já existe e está atualizado: {name}")
-                return
+                _grava_meta(meta_path, remote_head)
+                return None
+
+        for tentativa in range(1, tentativas + 1):
+            offset = os.path.getsize(parte) if os.path.exists(parte) else 0
+            meta_parte = _le_meta(meta_parte_path)
+            validador = meta_parte.get("etag") or meta_parte.get("last_modified")
 
-        print(f"Baixando {name}")
-        r = requests.get(url, timeout=60)
-        r.raise_for_status()
+            headers = {}
+            if offset and validador:
+                # Retoma só se o arquivo remoto não mudou (senão o servidor devolve 200)
+                headers["Range"] = f"bytes={offset}-"
+                headers["If-Range"] = validador
+            elif meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            elif meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
 
-        with open(filepath, "wb") as f:
-            f.write(r.content)
+            try:
+                with http.get(url, headers=headers, stream=True, timeout=timeout) as r:
+                    if r.status_code == 304:
+                        print(f"Já existe e está atualizado: {name}")
+                        return None
+                    if r.status_code == 416:
+                        # Parcial inválido para o arquivo remoto atual: recomeça do zero
+                        _remove(parte, meta_parte_path)
+                        continue
+                    r.raise_for_status()
 
-        print(f"✅ Arquivo salvo: {filepath}")
+                    if r.status_code == 206:
+                        print(f"Retomando {name} a partir de {offset / 1e6:.1f} MB")
+                        modo = "ab"
+                    else:
+                        print(f"Baixando {name}")
+                        modo = "wb"
+                        _grava_meta(meta_parte_path, r)
+
+                    with open(parte, modo) as f:
+                        for bloco in r.iter_content(chunk_size=CHUNK_SIZE):
+                            f.write(bloco)
+                            if progresso is not None:
+                                progresso.adiciona_bytes(len(bloco))
+            except (
+                requests.ConnectionError,
+                requests.Timeout,
+                requests.exceptions.ChunkedEncodingError,
+            ) as e:
+                print(f"Conexão interrompida ({tentativa}/{tentativas}) em {name}: {e}")
+                continue
+
+            os.replace(parte, filepath)
+            if os.path.exists(meta_parte_path):
+                os.replace(meta_parte_path, meta_path)
+            print(f"✅ Arquivo salvo: {filepath}")
+            return filepath
+
+        print(f"❌ Erro ao baixar {name}: tentativas esgotadas")
 
     except Exception as e:
         print(f"❌ Erro ao baixar {name}: {e}")
+    return None
+
+
+def baixar_concorrente(
+    csv_links, workers: int = DOWNLOAD_WORKERS, output_dir: str = OUTPUT_DIR, session=None
+):
+    """
+    Baixa os CSVs em paralelo em um pool de threads que compartilha uma única
+    sessão keep-alive. Retorna os caminhos dos arquivos com conteúdo novo.
+    """
+    session = session or cria_sessao(workers)
+    progresso = Progresso(len(csv_links))
+    baixados = []
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futuros = {
+            pool.submit(
+                download_csv, name, csv_url, output_dir, session=session, progresso=progresso
+            ): name
+            for name, csv_url in csv_links
+        }
+        for futuro in as_completed(futuros):
+            caminho = futuro.result()
+            if caminho:
+                baixados.append(caminho)
+            progresso.conclui_arquivo(futuros[futuro])
+
+    print(f"Downloads concluídos: {progresso.resumo()}")
+    return baixados
 
 
-def main(url: str = DEFAULT_DATASET_URL):
+def main(
+    url: str = DEFAULT_DATASET_URL, concorrente: bool = False, workers: int = DOWNLOAD_WORKERS
+):
     """Executa o processo completo de coleta de CSVs SRAG."""
     print(f"Iniciando coleta em {datetime.now():%Y-%m-%d %H:%M:%S}")
     print(f"URL usada: {url}")
 
-    soup = fetch_html(url=url)
+    session = cria_sessao(workers)
+    soup = fetch_html(url=url, session=session)
     csv_links = get_csv_links(soup)
 
     if not csv_links:
         print("⚠️ Nenhum link CSV encontrado.")
         return
 
-    for name, csv_url in csv_links:
-        download_csv(name, csv_url)
+    if concorrente:
+        baixar_concorrente(csv_links, workers=workers, session=session)
+    else:
+        for name, csv_url in csv_links:
+            download_csv(name, csv_url, session=session)
 
     print("✅ Processo concluído!")
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Coleta dos CSVs SRAG do OpenDataSUS.")
+    parser.add_argument("url", nargs="?", default=DEFAULT_DATASET_URL)
+    parser.add_argument("--concorrente", action="store_true", help="baixa os arquivos em paralelo")
+    parser.add_argument("--workers", type=int, default=DOWNLOAD_WORKERS)
+    args = parser.parse_args()
+    main(args.url, concorrente=args.concorrente, workers=args.workers)
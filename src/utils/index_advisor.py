@@ -0,0 +1,122 @@
+import argparse
+import os
+import re
+import sqlite3
+import sys
+
+from src.utils.db_utils import DB_PATH, cria_rollups
+
+# ===== CONSULTOR DE ÍNDICES =====
+# Roda EXPLAIN QUERY PLAN em cada consulta do Data Agent e aponta varreduras
+# completas e B-trees temporárias. Níveis: "ok", "aviso" (custo aceitável, mas
+# conferir) e "problema" (falta índice para o formato da consulta).
+OK, AVISO, PROBLEMA = "ok", "aviso", "problema"
+_SIMBOLOS = {OK: "✅", AVISO: "⚠️", PROBLEMA: "❌"}
+# Valor ligado aos parâmetros de data das consultas (o plano não depende do valor)
+DATA_PLANO = "9999-12-31"
+
+_SCAN = re.compile(r"^SCAN (\w+)(?: USING (COVERING )?INDEX (\w+))?")
+_SEARCH = re.compile(r"^SEARCH (\w+) USING (COVERING INDEX|INDEX|PRIMARY KEY|INTEGER PRIMARY KEY)")
+
+
+def tabelas_sem_rowid(con):
+    """Tabelas WITHOUT ROWID: a própria tabela é a B-tree da chave primária."""
+    linhas = con.execute("SELECT name, sql FROM sqlite_master WHERE type = 'table'").fetchall()
+    return {nome for nome, sql in linhas if sql and "WITHOUT ROWID" in sql.upper()}
+
+
+def plano(con, sql):
+    """Linhas de detalhe do EXPLAIN QUERY PLAN (placeholders `?` ligados a uma data)."""
+    params = (DATA_PLANO,) * sql.count("?")
+    return [linha[3] for linha in con.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+def classifica(detalhe, sem_rowid=frozenset()):
+    """Nível e explicação de uma linha do plano."""
+    if detalhe.startswith("USE TEMP B-TREE FOR ORDER BY"):
+        return AVISO, "ordenação em B-tree temporária (barata se ordena linhas já agregadas)"
+    if detalhe.startswith("USE TEMP B-TREE"):
+        return PROBLEMA, "agrupamento em B-tree temporária: falta índice na ordem do GROUP BY"
+
+    m = _SCAN.match(detalhe)
+    if m:
+        tabela, cobertura, indice = m.groups()
+        if indice and cobertura:
+            return OK, f"varredura somente do índice {indice}"
+        if indice:
+            return PROBLEMA, f"varredura de {indice} com acesso à tabela: índice não cobre"
+        if tabela in sem_rowid:
+            return AVISO, "varredura completa da chave primária (somente índice)"
+        return PROBLEMA, f"varredura completa de {tabela}"
+
+    m = _SEARCH.match(detalhe)
+    if m:
+        if m.group(2) == "INDEX":
+            return AVISO, "busca por índice com acesso à tabela"
+        return OK, "busca por intervalo no índice"
+    return OK, ""
+
+
+def analisa(con, consultas):
+    """Plano e achados de cada consulta {nome: sql}."""
+    sem_rowid = tabelas_sem_rowid(con)
+    resultado = []
+    for nome, sql in consultas.items():
+        detalhes = plano(con, sql)
+        achados = [(detalhe, *classifica(detalhe, sem_rowid)) for detalhe in detalhes]
+        resultado.append({"consulta": nome, "achados": achados})
+    return resultado
+
+
+def imprime(resultado):
+    for item in resultado:
+        nivel = max((a[1] for a in item["achados"]), key=[OK, AVISO, PROBLEMA].index, default=OK)
+        print(f"\n{_SIMBOLOS[nivel]} {item['consulta']}")
+        for detalhe, nivel_linha, explicacao in item["achados"]:
+            sufixo = f"  <- {explicacao}" if nivel_linha != OK else ""
+            print(f"    {detalhe}{sufixo}")
+
+
+def main(argv=None):
+    from src.agents.data_agent import CONSULTAS
+
+    parser = argparse.ArgumentParser(description="Confere os planos das consultas do Data Agent.")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument(
+        "--criar-indices",
+        action="store_true",
+        help="cria os índices recomendados (INDICES_ROLLUP) e atualiza as estatísticas",
+    )
+    parser.add_argument(
+        "--estrito", action="store_true", help="termina com erro se houver algum problema"
+    )
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        raise FileNotFoundError(f"Banco não encontrado: {args.db}")
+
+    if args.criar_indices:
+        con = sqlite3.connect(args.db)
+        try:
+            cria_rollups(con)
+            con.execute("ANALYZE")
+            con.commit()
+        finally:
+            con.close()
+        print("Índices das rollups criados e estatísticas atualizadas.")
+
+    con = sqlite3.connect(f"file:{os.path.abspath(args.db)}?mode=ro", uri=True)
+    try:
+        resultado = analisa(con, CONSULTAS)
+    finally:
+        con.close()
+    imprime(resultado)
+
+    problemas = sum(1 for item in resultado for a in item["achados"] if a[1] == PROBLEMA)
+    print(f"\n{len(resultado)} consultas analisadas | {problemas} problema(s)")
+    if args.estrito and problemas:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
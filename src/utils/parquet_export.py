@@ -0,0 +1,97 @@
+import os
+import shutil
+import sqlite3
+import sys
+
+import pandas as pd
+
+from src.utils.db_utils import DB_PATH, TABELA, TABELA_DIARIA, TABELA_MENSAL
+
+# ===== CAMINHOS E CONSTANTES =====
+PARQUET_DIR = "parquet"
+CHUNK_SIZE = 500000
+
+# Tabela exportada -> coluna usada para particionar por ano
+TABELAS_EXPORTADAS = {
+    TABELA: "DATA_NOTIFICACAO",
+    TABELA_DIARIA: "DATA_NOTIFICACAO",
+    TABELA_MENSAL: "MES",
+}
+
+
+def _anos(con, tabela, coluna):
+    """Lista os anos presentes na coluna de data (texto 'YYYY-...')."""
+    sql = f"SELECT DISTINCT substr({coluna}, 1, 4) FROM {tabela} WHERE {coluna} <> ''"
+    return [r[0] for r in con.execute(sql).fetchall() if r[0]]
+
+
+def _grava_parquet(duck, df, caminho):
+    """Grava um DataFrame em Parquet usando o DuckDB."""
+    # Colunas texto explícitas: um lote só com nulos não pode virar INTEGER no Parquet
+    df = df.astype({c: "string" for c in df.columns if df[c].dtype == object})
+    duck.register("lote", df)
+    try:
+        destino = caminho.replace("'", "''")
+        duck.execute(f"COPY lote TO '{destino}' (FORMAT PARQUET, COMPRESSION ZSTD)")
+    finally:
+        duck.unregister("lote")
+
+
+def exporta_tabela(con, duck, tabela, coluna, out_dir):
+    """Exporta uma tabela do SQLite para Parquet particionado por ano (ano=YYYY/)."""
+    destino = os.path.join(out_dir, tabela)
+    temporario = destino + ".tmp"
+    shutil.rmtree(temporario, ignore_errors=True)
+
+    # Limites com '-' para que a afinidade DATE do SQLite não os converta em número
+    particoes = [
+        (ano, f"{coluna} >= ? AND {coluna} < ?", (f"{ano}-", f"{int(ano) + 1}-"))
+        for ano in _anos(con, tabela, coluna)
+    ]
+    particoes.append(("desconhecido", f"({coluna} IS NULL OR {coluna} = '')", ()))
+
+    total = 0
+    for ano, filtro, params in particoes:
+        sql = f"SELECT * FROM {tabela} WHERE {filtro}"
+        for n, chunk in enumerate(pd.read_sql_query(sql, con, params=params, chunksize=CHUNK_SIZE)):
+            if chunk.empty:
+                continue
+            pasta = os.path.join(temporario, f"ano={ano}")
+            os.makedirs(pasta, exist_ok=True)
+            _grava_parquet(duck, chunk, os.path.join(pasta, f"part-{n:04d}.parquet"))
+            total += len(chunk)
+
+    # Troca o diretório antigo pelo novo somente após a exportação completa
+    os.makedirs(temporario, exist_ok=True)
+    shutil.rmtree(destino, ignore_errors=True)
+    os.replace(temporario, destino)
+    print(f"{tabela}: {total} linhas exportadas para {destino}")
+    return total
+
+
+def exporta_parquet(db_path=DB_PATH, out_dir=PARQUET_DIR):
+    """Exporta srag.db (casos e rollups) para Parquet particionado por ano."""
+    import duckdb
+
+    os.makedirs(out_dir, exist_ok=True)
+    con = sqlite3.connect(db_path)
+    duck = duckdb.connect()
+    try:
+        for tabela, coluna in TABELAS_EXPORTADAS.items():
+            exporta_tabela(con, duck, tabela, coluna, out_dir)
+    finally:
+        duck.close()
+        con.close()
+
+
+def main():
+    """Exporta o banco padrão para o diretório Parquet padrão."""
+    db_path = sys.argv[1] if len(sys.argv) > 1 else DB_PATH
+    out_dir = sys.argv[2] if len(sys.argv) > 2 else PARQUET_DIR
+    print(f"Exportando {db_path} para Parquet em '{out_dir}'...")
+    exporta_parquet(db_path, out_dir)
+    print("✅ Exportação concluída!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.utils.csv_reader import ENCODING, SEPARADOR
+
+# pyarrow é opcional: quando instalado, grava o CSV ~3x mais rápido que o pandas
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pv
+except ImportError:  # pragma: no cover - depende do ambiente
+    pa = None
+    pv = None
+
+# ===== GERADOR DE CSVs SINTÉTICOS NO FORMATO DO DATASUS =====
+# Permite exercitar a carga, o Data Agent e os benchmarks sem baixar os dados reais.
+SAIDA_PADRAO = os.path.join("data", "srag_csvs", "SRAG_SINTETICO.csv")
+LINHAS_POR_BLOCO = 250000
+DATA_INICIAL = "2021-01-01"
+DIAS = 4 * 365
+MARGEM_DIAS = 30  # datas derivadas podem ficar até 30 dias antes/depois da notificação
+
+UFS = [
+    "AC", "AL", "AM", "AP", "BA", "CE", "DF", "ES", "GO", "MA", "MG", "MS", "MT", "PA",
+    "PB", "PE", "PI", "PR", "RJ", "RN", "RO", "RR", "RS", "SC", "SE", "SP", "TO",
+]  # fmt: skip
+# Peso aproximado de cada UF nas notificações (SP e MG concentram a maior parte)
+PESOS_UF = np.array(
+    [1, 3, 3, 1, 7, 4, 3, 2, 4, 2, 14, 2, 2, 3, 2, 4, 1, 8, 8, 2, 1, 1, 7, 5, 1, 25, 1],
+    dtype=float,
+)
+
+# Colunas usadas pela carga: valores possíveis (None = vazio no CSV) e probabilidades
+CATEGORICAS = {
+    "CS_SEXO": (["M", "F", "I"], [0.51, 0.485, 0.005]),
+    "EVOLUCAO": ([1, 2, 3, 9, None], [0.68, 0.2, 0.02, 0.03, 0.07]),
+    "CLASSI_FIN": ([1, 2, 3, 4, 5, None], [0.04, 0.08, 0.01, 0.42, 0.3, 0.15]),
+    "UTI": ([1, 2, 9, None], [0.25, 0.62, 0.05, 0.08]),
+    "VACINA_COV": ([1, 2, 9, None], [0.45, 0.25, 0.1, 0.2]),
+    "VACINA": ([1, 2, 9, None], [0.3, 0.4, 0.15, 0.15]),
+}
+
+# Colunas de preenchimento, como no arquivo original: (tipo, parâmetro)
+EXTRAS = {
+    "SEM_NOT": ("semana", None),
+    "DT_SIN_PRI": ("data", -7),
+    "SEM_PRI": ("semana", None),
+    "SG_UF_NOT": ("uf", None),
+    "ID_REGIONA": ("texto", ["GVE I CAPITAL", "GVE XVII CAMPINAS", "1A RS", "NRS SUL"]),
+    "CO_REGIONA": ("inteiro", (1000, 9999)),
+    "ID_MUNICIP": ("texto", ["SAO PAULO", "RIO DE JANEIRO", "BELO HORIZONTE", "SALVADOR"]),
+    "CO_MUN_NOT": ("inteiro", (110000, 530010)),
+    "ID_UNIDADE": ("texto", ["HOSPITAL GERAL", "HOSPITAL MUNICIPAL", "SANTA CASA", "UPA 24H"]),
+    "CO_UNI_NOT": ("inteiro", (2000000, 9999999)),
+    "NU_IDADE_N": ("inteiro", (0, 100)),
+    "TP_IDADE": ("texto", [3, 3, 3, 2, 1]),
+    "CS_GESTANT": ("texto", [5, 6, 9, 1, 2, 3, 4]),
+    "CS_RACA": ("texto", [1, 2, 3, 4, 5, 9]),
+    "CS_ESCOL_N": ("texto", [0, 1, 2, 3, 4, 5, 9, None]),
+    "ID_PAIS": ("texto", ["BRASIL"]),
+    "FEBRE": ("texto", [1, 2, 9, None]),
+    "TOSSE": ("texto", [1, 2, 9, None]),
+    "GARGANTA": ("texto", [1, 2, 9, None]),
+    "DISPNEIA": ("texto", [1, 2, 9, None]),
+    "DESC_RESP": ("texto", [1, 2, 9, None]),
+    "SATURACAO": ("texto", [1, 2, 9, None]),
+    "DIARREIA": ("texto", [1, 2, 9, None]),
+    "VOMITO": ("texto", [1, 2, 9, None]),
+    "OUTRO_SIN": ("texto", [1, 2, 9, None]),
+    "OUTRO_DES": ("texto", ["", "CEFALEIA", "MIALGIA", "CORIZA", "ASTENIA"]),
+    "HOSPITAL": ("texto", [1, 2, 9]),
+    "DT_INTERNA": ("data", 1),
+    "DT_ENTUTI": ("data", 2),
+    "DT_SAIDUTI": ("data", 9),
+    "SUPORT_VEN": ("texto", [1, 2, 3, 9, None]),
+    "PCR_RESUL": ("texto", [1, 2, 3, 4, 5, 9, None]),
+    "DT_EVOLUCA": ("data", 12),
+    "DT_ENCERRA": ("data", 20),
+    "DT_DIGITA": ("data", 3),
+}
+
+
+def _escolhe(rng, valores, n, probabilidades=None):
+    """Amostra n valores (None vira célula vazia)."""
+    indices = rng.choice(len(valores), size=n, p=probabilidades)
+    tabela = np.array(["" if v is None else str(v) for v in valores], dtype=object)
+    return tabela[indices]
+
+
+def _calendario():
+    """Textos de data e de semana epidemiológica por dia (índice = dia + MARGEM_DIAS)."""
+    dias = pd.date_range(
+        pd.Timestamp(DATA_INICIAL) - pd.Timedelta(days=MARGEM_DIAS),
+        periods=DIAS + 2 * MARGEM_DIAS,
+    )
+    datas = dias.strftime("%Y-%m-%d").to_numpy(dtype=object)
+    semanas = dias.isocalendar().week.astype(str).to_numpy(dtype=object)
+    return datas, semanas
+
+
+def gera_bloco(rng, inicio_id, n, proporcao_sem_data=0.01, proporcao_duplicados=0.0):
+    """Gera um DataFrame (texto) com n notificações no layout do CSV do DATASUS."""
+    # Datas formatadas por consulta a uma tabela (strftime por linha é o gargalo)
+    datas, semanas = _calendario()
+    dias = rng.integers(0, DIAS, n) + MARGEM_DIAS
+
+    ids = inicio_id + rng.permutation(n)
+    if proporcao_duplicados:
+        # Reenvios da mesma notificação, como nas atualizações do OpenDataSUS
+        repetidos = rng.random(n) < proporcao_duplicados
+        ids[repetidos] = inicio_id + rng.integers(0, n, repetidos.sum())
+
+    dados = {
+        "NU_NOTIFIC": ids.astype(str),
+        "DT_NOTIFIC": datas[dias],
+        "SG_UF": _escolhe(rng, UFS, n, PESOS_UF / PESOS_UF.sum()),
+    }
+    dados["DT_NOTIFIC"][rng.random(n) < proporcao_sem_data] = ""
+    for coluna, (valores, probabilidades) in CATEGORICAS.items():
+        dados[coluna] = _escolhe(rng, valores, n, probabilidades)
+
+    for coluna, (tipo, parametro) in EXTRAS.items():
+        if tipo == "data":
+            deslocamento = rng.integers(0, abs(parametro) + 1, n) * np.sign(parametro)
+            dados[coluna] = datas[dias + deslocamento]
+        elif tipo == "semana":
+            dados[coluna] = semanas[dias]
+        elif tipo == "uf":
+            dados[coluna] = dados["SG_UF"]
+        elif tipo == "inteiro":
+            dados[coluna] = rng.integers(parametro[0], parametro[1], n).astype(str)
+        else:
+            dados[coluna] = _escolhe(rng, parametro, n)
+
+    # Ordem das colunas semelhante à do arquivo original
+    ordem = ["NU_NOTIFIC", "DT_NOTIFIC"] + [
+        c for c in dados if c not in ("NU_NOTIFIC", "DT_NOTIFIC")
+    ]
+    return pd.DataFrame(dados)[ordem]
+
+
+def _grava_bloco(f, bloco, cabecalho):
+    """Acrescenta o bloco ao arquivo binário `f` (valores sem aspas, como no original)."""
+    if cabecalho:
+        f.write((SEPARADOR.join(bloco.columns) + "\n").encode(ENCODING))
+    if pv is None:
+        f.write(bloco.to_csv(sep=SEPARADOR, index=False, header=False).encode(ENCODING))
+        return
+    # Os valores gerados são ASCII, então UTF-8 (pyarrow) e latin-1 coincidem
+    opcoes = pv.WriteOptions(include_header=False, delimiter=SEPARADOR, quoting_style="none")
+    pv.write_csv(pa.Table.from_pandas(bloco, preserve_index=False), f, opcoes)
+
+
+def gera_csv(
+    caminho,
+    linhas,
+    seed=0,
+    inicio_id=None,
+    proporcao_sem_data=0.01,
+    proporcao_duplicados=0.0,
+    linhas_por_bloco=LINHAS_POR_BLOCO,
+):
+    """Grava um CSV sintético com `linhas` notificações, em blocos para limitar a memória."""
+    rng = np.random.default_rng(seed)
+    inicio_id = (seed + 1) * 10**9 if inicio_id is None else inicio_id
+    os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+
+    t0 = time.perf_counter()
+    escritas = 0
+    with open(caminho, "wb") as f:
+        while escritas < linhas:
+            n = min(linhas_por_bloco, linhas - escritas)
+            bloco = gera_bloco(
+                rng, inicio_id + escritas, n, proporcao_sem_data, proporcao_duplicados
+            )
+            _grava_bloco(f, bloco, cabecalho=escritas == 0)
+            escritas += n
+            print(f"{os.path.basename(caminho)}: {escritas:,}/{linhas:,} linhas", end="\r")
+    print(f"\n{caminho}: {linhas:,} linhas em {time.perf_counter() - t0:.1f}s")
+    return caminho
+
+
+def quantidade_linhas(texto: str) -> int:
+    """Aceita 1000, 1M, 10M, 500k..."""
+    texto = texto.strip().lower().replace("_", "")
+    multiplicador = {"k": 10**3, "m": 10**6}.get(texto[-1:], 1)
+    return int(float(texto.rstrip("km")) * multiplicador)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera CSVs sintéticos no formato do DATASUS.")
+    parser.add_argument("--linhas", default="1M", help="ex.: 1M, 10M, 50M (padrão 1M)")
+    parser.add_argument("--saida", default=SAIDA_PADRAO)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sem-data", type=float, default=0.01, help="fração sem DT_NOTIFIC")
+    parser.add_argument(
+        "--duplicados", type=float, default=0.0, help="fração de NU_NOTIFIC repetidos"
+    )
+    args = parser.parse_args(argv)
+
+    gera_csv(
+        args.saida,
+        quantidade_linhas(args.linhas),
+        seed=args.seed,
+        proporcao_sem_data=args.sem_data,
+        proporcao_duplicados=args.duplicados,
+    )
+
+
+if __name__ == "__main__":
+    main()